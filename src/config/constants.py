@@ -43,15 +43,51 @@ NUM_TOGGLES: int = 16
 GROUP_TOGGLE_COUNT: int = 4
 DEFAULT_BPM: int = 120
 DEFAULT_VOLUME: int = 100
+# Pattern diffs with more changed steps than this are applied as a replacement
+PATTERN_DIFF_MAX_STEP_EDITS: int = 256
 
 # Audio rendering constants
 DEFAULT_FALLBACK_SAMPLE_SIZE: Tuple[int, int] = (1000, 2)
 
 # Progress bar constants
-PULSE_INTERVAL_SECONDS: float = 1.0
+# Overall export progress needed before a remaining time estimate is shown
+ETA_MIN_FRACTION: float = 0.05
+
+# Export queue constants
+EXPORT_QUEUE_MAX_WORKERS: int = 2
+EXPORT_WORKER_NICENESS: int = 10
+# ffmpeg encoders one export job runs at the same time, at most one per CPU
+EXPORT_MAX_ENCODERS_PER_JOB: int = 4
 
 # Audio constants
 MIXER_CHANNELS: int = 32
 
+# Pattern library constants
+# Folder name used under the user data and cache directories
+USER_DATA_DIR_NAME: str = "drum-machine"
+PATTERN_INDEX_FILENAME: str = "pattern-index.json"
+# Bump when the cached pattern index layout changes
+PATTERN_INDEX_VERSION: int = 1
+
+# Autosave constants
+# How long the journal writer waits to batch records before each fsync
+AUTOSAVE_FSYNC_INTERVAL_SECONDS: float = 1.0
+# Journal records written before the session is compacted into a snapshot
+AUTOSAVE_COMPACT_RECORDS: int = 2000
+
+# Undo history constants
+# Approximate memory the undo and redo stacks may use together
+HISTORY_MAX_BYTES: int = 4 * 1024 * 1024
+# BPM edits closer together than this are undone as one
+HISTORY_COALESCE_SECONDS: float = 0.5
+
+# Startup constants
+# Import time of the application modules above which startup logs a warning
+IMPORT_TIME_BUDGET_MS: float = 300.0
+
+# Carousel constants
+# Detached step grid pages kept for reuse instead of being destroyed
+CAROUSEL_PAGE_POOL_SIZE: int = 8
+
 # Supported audio file formats for input/import
 SUPPORTED_INPUT_AUDIO_FORMATS: Set[str] = {".wav", ".mp3", ".ogg", ".flac"}
@@ -23,7 +23,8 @@ import logging
 from gi.repository import Adw, Gtk, GLib, Gio
 from gettext import gettext as _
 
-from ..utils.export_progress import ExportProgressHandler, ExportTask
+from ..services.export_queue_service import ExportTask
+from ..utils.export_progress import ExportProgressHandler
 
 
 @Gtk.Template(
@@ -43,6 +44,8 @@ class AudioExportDialog(Adw.Dialog):
     cancel_button = Gtk.Template.Child()
     format_row = Gtk.Template.Child()
     format_list = Gtk.Template.Child()
+    extra_formats_row = Gtk.Template.Child()
+    stems_row = Gtk.Template.Child()
     repeat_row = Gtk.Template.Child()
     artist_row = Gtk.Template.Child()
     song_row = Gtk.Template.Child()
@@ -54,7 +57,7 @@ class AudioExportDialog(Adw.Dialog):
         self,
         parent_window,
         audio_export_service,
-        drum_parts_state,
+        pattern,
         bpm,
         suggested_filename,
     ):
@@ -62,7 +65,7 @@ class AudioExportDialog(Adw.Dialog):
 
         self.window = parent_window
         self.audio_export_service = audio_export_service
-        self.drum_parts_state = drum_parts_state
+        self.pattern = pattern
         self.bpm = bpm
         self.suggested_filename = (
             "new_beat" if suggested_filename is None else suggested_filename
@@ -75,7 +78,10 @@ class AudioExportDialog(Adw.Dialog):
         self.progress_handler = ExportProgressHandler(
             self.progress_bar, self.status_overlay, self.status_label, self.detail_label
         )
-        self.export_task = ExportTask(audio_export_service, self.progress_handler)
+        self.export_task = ExportTask(
+            parent_window.export_queue_service, self.progress_handler
+        )
+        self.extra_format_switches = {}
 
         self._setup_ui()
         self._connect_signals()
@@ -93,12 +99,18 @@ class AudioExportDialog(Adw.Dialog):
             format_info = formats[format_id]
             self.format_list.append(format_info.display)
 
+            switch_row = Adw.SwitchRow(title=format_info.display)
+            self.extra_formats_row.add_row(switch_row)
+            self.extra_format_switches[format_id] = switch_row
+        self._update_extra_formats()
+
     def _connect_signals(self):
         """Connect UI signals"""
         self.export_button.connect("clicked", self._on_export_clicked)
         self.cancel_button.connect("clicked", self._on_cancel_clicked)
         self.cover_button.connect("clicked", self._on_cover_button_clicked)
         self.format_row.connect("notify::selected", self._on_format_changed)
+        self.stems_row.connect("notify::active", self._on_stems_changed)
         self.connect("closed", self._on_dialog_closed)
 
     def _create_file_dialog_with_format(self, selected_format):
@@ -127,15 +139,7 @@ class AudioExportDialog(Adw.Dialog):
         drum_part_manager = self.window.sound_service.drum_part_manager
         temporary_parts_with_beats = []
 
-        for part_id, part_state in self.drum_parts_state.items():
-            if not part_state:
-                continue
-
-            # Check if this part has any active beats
-            has_active_beats = any(part_state.values())
-            if not has_active_beats:
-                continue
-
+        for part_id in self.pattern.get_active_parts():
             # Check if this is a temporary part (no file path)
             part = drum_part_manager.get_part_by_id(part_id)
             if part and not part.file_path:
@@ -166,9 +170,32 @@ class AudioExportDialog(Adw.Dialog):
         )
         self.metadata_manager.set_sensitivity(format_info.supports_metadata)
 
+    def _update_extra_formats(self):
+        """Hide the primary format from the additional formats list"""
+        selected_format = self.format_row.get_selected()
+        for format_id, switch_row in self.extra_format_switches.items():
+            is_primary = format_id == selected_format
+            switch_row.set_visible(not is_primary)
+            if is_primary:
+                switch_row.set_active(False)
+
+    def _on_stems_changed(self, switch_row, pspec):
+        """Stems are written in the primary format only"""
+        self.extra_formats_row.set_sensitive(not switch_row.get_active())
+
+    def _get_extra_formats(self):
+        """Get the additional formats switched on by the user"""
+        registry = self.audio_export_service.format_registry
+        return [
+            registry.get_format(format_id)
+            for format_id, switch_row in self.extra_format_switches.items()
+            if switch_row.get_active()
+        ]
+
     def _on_format_changed(self, combo_row, pspec):
         """Handle format selection change"""
         self._update_metadata_sensitivity()
+        self._update_extra_formats()
 
     def _on_cover_button_clicked(self, button):
         """Handle cover art file selection"""
@@ -220,8 +247,33 @@ class AudioExportDialog(Adw.Dialog):
 
         self._disable_export_controls()
 
+        if self.stems_row.get_active():
+            self.export_task.start_stem_export(
+                self.pattern,
+                self.bpm,
+                filename,
+                repeat_count,
+                metadata,
+                self._on_multi_export_complete,
+            )
+            return
+
+        extra_formats = self._get_extra_formats()
+        if extra_formats:
+            base_path = os.path.splitext(filename)[0]
+            filenames = [filename] + [base_path + fmt.ext for fmt in extra_formats]
+            self.export_task.start_multi_export(
+                self.pattern,
+                self.bpm,
+                filenames,
+                repeat_count,
+                metadata,
+                self._on_multi_export_complete,
+            )
+            return
+
         self.export_task.start_export(
-            self.drum_parts_state,
+            self.pattern,
             self.bpm,
             filename,
             repeat_count,
@@ -232,6 +284,8 @@ class AudioExportDialog(Adw.Dialog):
     def _disable_export_controls(self):
         """Disable export controls during export"""
         self.format_row.set_sensitive(False)
+        self.extra_formats_row.set_sensitive(False)
+        self.stems_row.set_sensitive(False)
         self.repeat_row.set_sensitive(False)
         self.metadata_manager.set_sensitivity(False)
         self.export_button.set_visible(False)
@@ -252,6 +306,29 @@ class AudioExportDialog(Adw.Dialog):
 
         self.close()
 
+    def _on_multi_export_complete(self, results):
+        """Handle completion of a multi-target export"""
+        written = [filename for filename, success in results.items() if success]
+        failed = [filename for filename, success in results.items() if not success]
+        for filename in failed:
+            logging.error(f"Audio export failed for: {filename}")
+
+        if written and not failed:
+            logging.info(f"Audio export completed successfully: {written}")
+            self.window.show_toast(
+                _("Audio exported to {} files").format(len(written)),
+                open_file=True,
+                file_path=os.path.dirname(written[0]),
+            )
+        elif written:
+            self.window.show_toast(
+                _("Exported {} of {} files").format(len(written), len(results))
+            )
+        else:
+            self.window.show_toast(_("Export failed"))
+
+        self.close()
+
     def _on_cancel_clicked(self, button):
         """Handle cancel button click"""
         self.export_task.cancel_export()
@@ -259,8 +336,10 @@ class AudioExportDialog(Adw.Dialog):
         self.close()
 
     def _on_dialog_closed(self, dialog):
-        """Handle dialog close - cancel export if still running"""
-        self.export_task.cancel_export()
+        """Handle dialog close - keep a running export going in the background"""
+        if self.export_task.is_running and not self.export_task.is_cancelled:
+            self.export_task.detach()
+            self.window.show_toast(_("Export continues in the background"))
         self.progress_handler.stop_progress_tracking()
 
 
@@ -218,9 +218,10 @@ class DragDropHandler:
         if source_index == target_index:
             return False
 
-        if drum_part_manager.reorder_part(source_drum_id, target_index):
-            self.window.drum_grid_builder.rebuild_drum_parts_column()
-            self.window.drum_grid_builder.rebuild_carousel()
+        with self.window.history_service.record_session():
+            reordered = drum_part_manager.reorder_part(source_drum_id, target_index)
+        if reordered:
+            self.window.drum_grid_builder.move_drum_part_row(source_drum_id)
             return True
 
         return False
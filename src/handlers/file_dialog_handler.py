@@ -26,8 +26,8 @@ gi.require_version("Gio", "2.0")
 gi.require_version("Adw", "1")
 from gi.repository import Gtk, Gio, GLib
 from gettext import gettext as _
-from ..config.constants import DEFAULT_PATTERNS, SUPPORTED_INPUT_AUDIO_FORMATS
-from ..dialogs.audio_export_dialog import AudioExportDialog
+from ..config.constants import SUPPORTED_INPUT_AUDIO_FORMATS
+from ..utils.project_file import PROJECT_EXTENSION
 
 
 class FileDialogHandler:
@@ -36,27 +36,50 @@ class FileDialogHandler:
     def __init__(self, window):
         self.window = window
         self.filename = None
+        self.file_extension = ".mid"
+        # Folder of the file the pattern was opened from or saved to, if any
+        self.file_directory = None
 
     def setup_pattern_menu(self):
-        """Setup the pattern menu with default patterns"""
-        menu = Gio.Menu.new()
-        section = Gio.Menu.new()
-
-        for pattern in DEFAULT_PATTERNS:
-            item = Gio.MenuItem.new(pattern, "win.load-pattern")
-            item.set_action_and_target_value(
-                "win.load-pattern", GLib.Variant.new_string(pattern)
-            )
-            section.append_item(item)
-
-        menu.append_section(_("Default Patterns"), section)
-
+        """Setup the pattern menu with default and user patterns"""
         pattern_action = Gio.SimpleAction.new("load-pattern", GLib.VariantType.new("s"))
         pattern_action.connect("activate", self.on_pattern_selected)
         self.window.add_action(pattern_action)
 
+        # Show the cached index right away and rescan the folders off startup
+        self._update_pattern_menu()
+        self.refresh_pattern_menu()
+
+    def refresh_pattern_menu(self):
+        """Rescan the pattern folders and rebuild the menu once that is done"""
+        self.window.pattern_library_service.refresh_async(self._update_pattern_menu)
+
+    def _update_pattern_menu(self):
+        """Rebuild the pattern menu from the pattern library index"""
+        library = self.window.pattern_library_service
+        menu = Gio.Menu.new()
+        menu.append_section(
+            _("Default Patterns"),
+            self._create_pattern_section(library.get_bundled_entries()),
+        )
+        user_entries = library.get_user_entries()
+        if user_entries:
+            menu.append_section(
+                _("My Patterns"), self._create_pattern_section(user_entries)
+            )
+
         self.window.file_pattern_button.set_menu_model(menu)
 
+    def _create_pattern_section(self, entries):
+        section = Gio.Menu.new()
+        for entry in entries:
+            item = Gio.MenuItem.new(entry.name, "win.load-pattern")
+            item.set_action_and_target_value(
+                "win.load-pattern", GLib.Variant.new_string(entry.file_path)
+            )
+            section.append_item(item)
+        return section
+
     def handle_open_file(self):
         """Handle opening a file with unsaved changes check"""
         if self.window.save_changes_service.has_unsaved_changes():
@@ -72,11 +95,14 @@ class FileDialogHandler:
 
     def handle_export_audio(self):
         """Handle audio export"""
+        # Export is rarely used, so its modules are only imported on demand
+        from ..dialogs.audio_export_dialog import AudioExportDialog
+
         # Show export dialog
         export_dialog = AudioExportDialog(
             self.window,
             self.window.audio_export_service,
-            self.window.drum_machine_service.drum_parts_state,
+            self.window.drum_machine_service.pattern,
             self.window.drum_machine_service.bpm,
             self.filename,
         )
@@ -85,17 +111,33 @@ class FileDialogHandler:
     def _save_and_open_file(self):
         self.show_save_dialog(self._open_file_directly)
 
+    def _create_pattern_file_filters(self):
+        """Create filters for project and MIDI files, projects first"""
+        project_filter = Gtk.FileFilter.new()
+        project_filter.add_pattern(f"*{PROJECT_EXTENSION}")
+        project_filter.set_name(_("Drum Machine projects"))
+
+        midi_filter = Gtk.FileFilter.new()
+        midi_filter.add_pattern("*.mid")
+        midi_filter.set_name(_("MIDI files"))
+
+        filefilters = Gio.ListStore.new(Gtk.FileFilter)
+        filefilters.append(project_filter)
+        filefilters.append(midi_filter)
+        return filefilters
+
     def _open_file_directly(self):
         """Show file open dialog"""
-        filefilter = Gtk.FileFilter.new()
-        filefilter.add_pattern("*.mid")
-        filefilter.set_name(_("MIDI files"))
+        all_filter = Gtk.FileFilter.new()
+        all_filter.add_pattern(f"*{PROJECT_EXTENSION}")
+        all_filter.add_pattern("*.mid")
+        all_filter.set_name(_("All supported files"))
 
-        filefilters = Gio.ListStore.new(Gtk.FileFilter)
-        filefilters.append(filefilter)
+        filefilters = self._create_pattern_file_filters()
+        filefilters.insert(0, all_filter)
 
         dialog = Gtk.FileDialog.new()
-        dialog.set_title(_("Open MIDI File"))
+        dialog.set_title(_("Open File"))
         dialog.set_filters(filefilters)
         dialog.set_modal(True)
 
@@ -107,15 +149,16 @@ class FileDialogHandler:
             file = dialog.open_finish(response)
             if file:
                 file_path = file.get_path()
-                # Load the pattern data into the service
-                self.window.drum_machine_service.load_pattern(file_path)
-                # Update the UI to reflect the new pattern structure
-                self.window.drum_machine_service.update_total_beats()
-                self.window.drum_grid_builder.reset_carousel_pages()
-                self.window.ui_helper.load_pattern_into_ui(
-                    self.window.drum_machine_service.drum_parts_state
-                )
+                # Load the project or pattern data into the service; the grid
+                # is rebuilt once when the batch ends
+                with self.window.drum_grid_builder.batch_update():
+                    if file_path.endswith(PROJECT_EXTENSION):
+                        self.window.drum_machine_service.load_project(file_path)
+                    else:
+                        self.window.drum_machine_service.load_pattern(file_path)
+                self.file_extension = os.path.splitext(file_path)[1]
                 self.filename = self._get_filename_without_extension(file)
+                self.file_directory = os.path.dirname(file_path)
 
                 self.window.update_export_button_sensitivity()
                 self.window.save_changes_service.mark_unsaved_changes(False)
@@ -140,57 +183,56 @@ class FileDialogHandler:
         self.show_save_dialog(lambda: self._open_pattern_directly(parameter))
 
     def _open_pattern_directly(self, parameter):
-        """Load a pattern directly"""
-        pattern_name = parameter.get_string()
-        pattern_dir = os.path.join(
-            os.path.dirname(__file__), "..", "..", "data", "patterns"
-        )
-        file_path = os.path.join(pattern_dir, f"{pattern_name}.mid")
+        """Load a pattern from the pattern library"""
+        file_path = parameter.get_string()
+        entry = self.window.pattern_library_service.get_entry(file_path)
+        pattern_name = entry.name if entry else os.path.basename(file_path)
 
         try:
-            # Load the pattern data into the service
-            self.window.drum_machine_service.load_pattern(file_path)
-            # Update the UI to reflect the new pattern structure
-            self.window.drum_machine_service.update_total_beats()
-            self.window.drum_grid_builder.reset_carousel_pages()
-            self.window.ui_helper.load_pattern_into_ui(
-                self.window.drum_machine_service.drum_parts_state
-            )
-            self.filename = None
+            # Load the pre-parsed pattern, or the file if it is not indexed
+            with self.window.drum_grid_builder.batch_update():
+                if entry:
+                    self.window.drum_machine_service.load_library_entry(entry)
+                else:
+                    self.window.drum_machine_service.load_pattern(file_path)
+            is_bundled = entry is not None and entry.is_bundled
+            self.filename = None if is_bundled else pattern_name
+            self.file_extension = ".mid"
+            self.file_directory = None if is_bundled else os.path.dirname(file_path)
 
             self.window.update_export_button_sensitivity()
             self.window.save_changes_service.mark_unsaved_changes(False)
         except Exception as e:
-            logging.error(f"Failed to load default pattern '{pattern_name}': {e}")
+            logging.error(f"Failed to load pattern '{pattern_name}': {e}")
             self.window.show_toast(_("Failed to load pattern"))
 
     def show_save_dialog(self, after_save_callback=None):
         """Show save file dialog"""
-        filefilter = Gtk.FileFilter.new()
-        filefilter.add_pattern("*.mid")
-        filefilter.set_name(_("MIDI files"))
-
-        filefilters = Gio.ListStore.new(Gtk.FileFilter)
-        filefilters.append(filefilter)
-
-        initial_name = f"{self.filename or 'new_sequence'}.mid"
+        initial_name = f"{self.filename or 'new_sequence'}{self.file_extension}"
 
         dialog = Gtk.FileDialog.new()
         dialog.set_title(_("Save Sequence"))
-        dialog.set_filters(filefilters)
+        dialog.set_filters(self._create_pattern_file_filters())
         dialog.set_modal(True)
         dialog.set_initial_name(initial_name)
+        # Save next to the current file; new patterns go to the user folder
+        folder = (
+            self.file_directory
+            or self.window.pattern_library_service.ensure_user_dir()
+        )
+        dialog.set_initial_folder(Gio.File.new_for_path(folder))
 
         def save_callback(dialog, result):
             try:
                 file = dialog.save_finish(result)
                 if file:
-                    file_path = file.get_path()
-                    if not file_path.endswith(".mid"):
-                        file_path += ".mid"
-                    self.window.drum_machine_service.save_pattern(file_path)
+                    file_path = self._save_to_path(file.get_path())
                     self.window.save_changes_service.mark_unsaved_changes(False)
                     self.filename = self._get_filename_without_extension(file)
+                    self.file_directory = os.path.dirname(file_path)
+                    library = self.window.pattern_library_service
+                    if library.is_user_pattern_path(file_path):
+                        self.refresh_pattern_menu()
                     if after_save_callback:
                         after_save_callback()
             except GLib.Error as e:
@@ -261,6 +303,17 @@ class FileDialogHandler:
         else:
             dialog.open(parent=self.window, callback=internal_callback)
 
+    def _save_to_path(self, file_path):
+        """Save as a project or MIDI file depending on the extension"""
+        if file_path.endswith(PROJECT_EXTENSION):
+            self.window.drum_machine_service.save_project(file_path)
+        else:
+            if not file_path.endswith(".mid"):
+                file_path += ".mid"
+            self.window.drum_machine_service.save_pattern(file_path)
+        self.file_extension = os.path.splitext(file_path)[1]
+        return file_path
+
     def _get_filename_without_extension(self, file):
         """Extract filename without extension from Gio.File"""
         base_name = file.get_basename()
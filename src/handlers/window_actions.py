@@ -26,6 +26,7 @@ gi.require_version("Gio", "2.0")
 gi.require_version("Adw", "1")
 from gi.repository import Gio
 from ..dialogs.reset_defaults_dialog import ResetDefaultsDialog
+from ..ui.step_grid import StepGrid
 
 
 class WindowActionHandler:
@@ -41,6 +42,8 @@ class WindowActionHandler:
             ("show-help-overlay", self.on_show_help_overlay, ["<primary>question"]),
             ("play_pause", self.handle_play_pause_action, ["space"]),
             ("clear_toggles", self.handle_clear_action, ["<primary>Delete"]),
+            ("undo", self.handle_undo_action, ["<primary>z"]),
+            ("redo", self.handle_redo_action, ["<primary><shift>z", "<primary>y"]),
             ("increase_bpm", self.increase_bpm_action, ["plus", "equal"]),
             ("decrease_bpm", self.decrease_bpm_action, ["minus"]),
             ("increase_volume", self.increase_volume_action, ["<primary>Up"]),
@@ -61,6 +64,9 @@ class WindowActionHandler:
         for action_name, callback, shortcuts in actions:
             self._create_action(action_name, callback, shortcuts)
 
+        self.window.history_service.add_listener(self.update_history_actions)
+        self.update_history_actions()
+
     def _create_action(
         self, name: str, callback: Callable, shortcuts: Optional[List[str]] = None
     ) -> None:
@@ -71,6 +77,12 @@ class WindowActionHandler:
         if shortcuts:
             self.window.application.set_accels_for_action(f"win.{name}", shortcuts)
 
+    def update_history_actions(self) -> None:
+        """Enable undo and redo only when there is something to apply"""
+        history_service = self.window.history_service
+        self.window.lookup_action("undo").set_enabled(history_service.can_undo())
+        self.window.lookup_action("redo").set_enabled(history_service.can_redo())
+
     # Action handlers
     def on_open_menu_action(
         self, action: Gio.SimpleAction, param: Optional[object]
@@ -85,13 +97,25 @@ class WindowActionHandler:
     def handle_play_pause_action(
         self, action: Gio.SimpleAction, param: Optional[object]
     ) -> None:
-        self.window.handle_play_pause(self.window.play_pause_button)
+        # The button stays insensitive until the samples are loaded
+        if self.window.play_pause_button.get_sensitive():
+            self.window.handle_play_pause(self.window.play_pause_button)
 
     def handle_clear_action(
         self, action: Gio.SimpleAction, param: Optional[object]
     ) -> None:
         self.window.handle_clear(self.window.clear_button)
 
+    def handle_undo_action(
+        self, action: Gio.SimpleAction, param: Optional[object]
+    ) -> None:
+        self.window.history_service.undo()
+
+    def handle_redo_action(
+        self, action: Gio.SimpleAction, param: Optional[object]
+    ) -> None:
+        self.window.history_service.redo()
+
     def increase_bpm_action(
         self, action: Gio.SimpleAction, param: Optional[object]
     ) -> None:
@@ -149,20 +173,14 @@ class WindowActionHandler:
         if hasattr(self.window, "carousel"):
             # Find which drum part is currently focused
             focused_widget = self.window.get_focus()
-            if focused_widget:
-                widget_name = focused_widget.get_name()
-                if widget_name and "_toggle_" in widget_name:
-                    drum_part = widget_name.split("_toggle_")[0]
-                    try:
-                        instrument_button = getattr(
-                            self.window, f"{drum_part}_instrument_button"
-                        )
-                        instrument_button.grab_focus()
-                    except AttributeError as e:
-                        logging.debug(
-                            f"Could not find instrument button for {drum_part}: {e}"
-                        )
-                        pass
+            if isinstance(focused_widget, StepGrid):
+                drum_part = focused_widget.get_focused_part_id()
+                drum_grid_builder = self.window.drum_grid_builder
+                instrument_button = drum_grid_builder.get_instrument_button(drum_part)
+                if instrument_button:
+                    instrument_button.grab_focus()
+                elif drum_part:
+                    logging.debug(f"Could not find instrument button for {drum_part}")
 
     def handle_previous_page_action(
         self, action: Gio.SimpleAction, param: Optional[object]
@@ -18,9 +18,23 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import sys
-from .application import DrumMachineApplication
+import time
+import logging
+from .config.constants import IMPORT_TIME_BUDGET_MS
 
 
 def main(version: str) -> int:
+    # Imported here so the import time of the whole app can be measured
+    start = time.perf_counter()
+    from .application import DrumMachineApplication
+
+    import_time = (time.perf_counter() - start) * 1000
+    logging.debug(f"Startup: imports took {import_time:.1f} ms")
+    if import_time > IMPORT_TIME_BUDGET_MS:
+        logging.warning(
+            f"Startup imports took {import_time:.1f} ms, over the "
+            f"{IMPORT_TIME_BUDGET_MS:.0f} ms budget; see python -X importtime"
+        )
+
     app = DrumMachineApplication(version=version)
     return app.run(sys.argv)
@@ -0,0 +1,493 @@
+# models/pattern.py
+#
+# Copyright 2025 revisto
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import numpy as np
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from ..config.constants import NUM_TOGGLES, PATTERN_DIFF_MAX_STEP_EDITS
+
+
+class PatternChangeKind(Enum):
+    STEP_SET = "step-set"
+    STEP_CLEARED = "step-cleared"
+    PART_ADDED = "part-added"
+    PART_REMOVED = "part-removed"
+    REPLACED = "replaced"
+
+
+@dataclass(frozen=True)
+class PatternChange:
+    """A single edit of a Pattern, delivered to its listeners"""
+
+    kind: PatternChangeKind
+    version: int
+    part_id: Optional[str] = None
+    step: Optional[int] = None
+
+
+class PatternView:
+    """Read-only queries shared by Pattern and PatternSnapshot
+
+    Subclasses provide the parts × steps matrix, the part id → row index
+    and the derived hit counts.
+    """
+
+    _part_ids: List[str]
+    _rows: Dict[str, int]
+    _matrix: np.ndarray
+    _part_counts: np.ndarray
+    _step_counts: np.ndarray
+    _hit_count: int
+    _last_step: int
+    _triggers: Dict[int, Tuple[str, ...]]
+    _version: int
+
+    @property
+    def part_ids(self) -> List[str]:
+        """Part ids in row order"""
+        return list(self._part_ids)
+
+    @property
+    def step_capacity(self) -> int:
+        """Number of allocated step columns"""
+        return self._matrix.shape[1]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Read-only view of the parts × steps matrix"""
+        view = self._matrix.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def version(self) -> int:
+        """Counter bumped on every change"""
+        return self._version
+
+    @property
+    def hit_count(self) -> int:
+        """Number of active steps across all parts"""
+        return self._hit_count
+
+    def __contains__(self, part_id: str) -> bool:
+        return part_id in self._rows
+
+    def __len__(self) -> int:
+        return len(self._part_ids)
+
+    def is_active(self, part_id: str, step: int) -> bool:
+        """Return whether a part is triggered on a step"""
+        row = self._rows.get(part_id)
+        if row is None or not 0 <= step < self.step_capacity:
+            return False
+        return bool(self._matrix[row, step])
+
+    def any_active(self) -> bool:
+        """Return whether any step of any part is active"""
+        return self._hit_count > 0
+
+    def has_active_steps(self, part_id: str) -> bool:
+        """Return whether a part has at least one active step"""
+        row = self._rows.get(part_id)
+        return row is not None and bool(self._part_counts[row])
+
+    def last_active_step(self, part_id: str = None) -> int:
+        """Return the highest active step, or -1 if there is none
+
+        Args:
+            part_id: Limit the search to one part instead of the whole pattern
+        """
+        if part_id is None:
+            return self._last_step
+        row = self._rows.get(part_id)
+        if row is None:
+            return -1
+        active = np.flatnonzero(self._matrix[row])
+        return int(active[-1]) if active.size else -1
+
+    def get_active_steps(self, part_id: str) -> List[int]:
+        """Return the sorted active steps of one part"""
+        row = self._rows.get(part_id)
+        if row is None:
+            return []
+        return np.flatnonzero(self._matrix[row]).tolist()
+
+    def get_parts_at_step(self, step: int) -> Tuple[str, ...]:
+        """Return the ids of all parts triggered on a step, in row order
+
+        Results are cached per step until that step is edited.
+        """
+        triggers = self._triggers.get(step)
+        if triggers is None:
+            if 0 <= step < self.step_capacity and self._step_counts[step]:
+                rows = np.flatnonzero(self._matrix[:, step])
+                triggers = tuple(self._part_ids[row] for row in rows)
+            else:
+                triggers = ()
+            self._triggers[step] = triggers
+        return triggers
+
+    def get_active_parts(self) -> List[str]:
+        """Return the ids of all parts with at least one active step"""
+        rows = np.flatnonzero(self._part_counts)
+        return [self._part_ids[row] for row in rows]
+
+    def get_hits(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (rows, steps) arrays of every active step
+
+        Hits are ordered by step, then by row. Rows index into part_ids.
+        """
+        steps, rows = np.nonzero(self._matrix.T)
+        return rows, steps
+
+    def iter_hits(self) -> Iterator[Tuple[str, int]]:
+        """Yield (part_id, step) for every active step, ordered by step"""
+        rows, steps = self.get_hits()
+        for row, step in zip(rows.tolist(), steps.tolist()):
+            yield self._part_ids[row], step
+
+    def to_dict(self) -> Dict[str, List[int]]:
+        """Serialize to a mapping of part id to its active steps"""
+        return {part_id: self.get_active_steps(part_id) for part_id in self._part_ids}
+
+
+class PatternSnapshot(PatternView):
+    """Immutable copy of a Pattern at one version
+
+    Snapshots are safe to read from any thread while the pattern keeps
+    changing, since edits never touch an already published snapshot.
+    """
+
+    def __init__(self, pattern: "Pattern"):
+        self._part_ids = tuple(pattern._part_ids)
+        self._rows = dict(pattern._rows)
+        self._matrix = self._frozen(pattern._matrix)
+        self._part_counts = self._frozen(pattern._part_counts)
+        self._step_counts = self._frozen(pattern._step_counts)
+        self._hit_count = pattern._hit_count
+        self._last_step = pattern._last_step
+        self._triggers = dict(pattern._triggers)
+        self._version = pattern._version
+
+    @staticmethod
+    def _frozen(array: np.ndarray) -> np.ndarray:
+        frozen = array.copy()
+        frozen.flags.writeable = False
+        return frozen
+
+
+class Pattern(PatternView):
+    """Drum pattern stored as a parts × steps boolean matrix
+
+    Each drum part owns one row, looked up through a part id → row index,
+    and each step is one column. The column count grows on demand, so
+    setting a step past the current width never fails.
+
+    Hit counts, the last active step and the per-step trigger table are
+    kept up to date on every edit, and listeners receive a PatternChange
+    for each one.
+
+    Only the GTK thread edits a Pattern. After each edit it builds the next
+    PatternSnapshot and publishes it by swapping a single reference, so
+    playback and export threads read snapshots without locking and never see
+    a half-applied edit. Inside hold_snapshots() edits are only counted, and
+    one snapshot is published for all of them when the block ends.
+    """
+
+    def __init__(self, part_ids: Iterable[str] = (), steps: int = NUM_TOGGLES):
+        self._part_ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._matrix = np.zeros((0, max(1, steps)), dtype=np.bool_)
+        self._part_counts = np.zeros(0, dtype=np.int64)
+        self._step_counts = np.zeros(max(1, steps), dtype=np.int64)
+        self._hit_count = 0
+        self._last_step = -1
+        self._triggers: Dict[int, Tuple[str, ...]] = {}
+        self._version = 0
+        self._listeners: List[Callable[[PatternChange], None]] = []
+        self._hold_depth = 0
+        self._snapshot = PatternSnapshot(self)
+        with self.hold_snapshots():
+            for part_id in part_ids:
+                self.add_part(part_id)
+
+    @property
+    def snapshot(self) -> PatternSnapshot:
+        """The last published snapshot; safe to read from any thread
+
+        Edits made inside hold_snapshots() are not in it until the block ends.
+        """
+        return self._snapshot
+
+    def publish_snapshot(self) -> PatternSnapshot:
+        """Publish any held edits now and return the up-to-date snapshot
+
+        Only the thread that edits the pattern may call this.
+        """
+        if self._snapshot.version != self._version:
+            self._snapshot = PatternSnapshot(self)
+        return self._snapshot
+
+    @contextmanager
+    def hold_snapshots(self) -> Iterator[None]:
+        """Publish a single snapshot for all edits made inside the block"""
+        self._hold_depth += 1
+        try:
+            yield
+        finally:
+            self._hold_depth -= 1
+            if not self._hold_depth:
+                self.publish_snapshot()
+
+    def add_listener(self, listener: Callable[[PatternChange], None]) -> None:
+        """Call listener with a PatternChange after every edit"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[PatternChange], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def add_part(self, part_id: str) -> None:
+        """Add an empty row for a part, if it is not already present"""
+        if part_id in self._rows:
+            return
+        self._rows[part_id] = len(self._part_ids)
+        self._part_ids.append(part_id)
+        empty_row = np.zeros((1, self.step_capacity), dtype=np.bool_)
+        self._matrix = np.vstack((self._matrix, empty_row))
+        self._part_counts = np.append(self._part_counts, 0)
+        self._changed()
+        self._emit(PatternChangeKind.PART_ADDED, part_id)
+
+    def remove_part(self, part_id: str) -> bool:
+        """Remove a part's row. Returns False if the part is unknown."""
+        if part_id not in self._rows:
+            return False
+        row = self._rows.pop(part_id)
+        if self._part_counts[row]:
+            self._step_counts -= self._matrix[row]
+            self._hit_count -= int(self._part_counts[row])
+            self._last_step = self._find_last_step(self.step_capacity)
+            self._triggers.clear()
+        self._matrix = np.delete(self._matrix, row, axis=0)
+        self._part_counts = np.delete(self._part_counts, row)
+        del self._part_ids[row]
+        for index in range(row, len(self._part_ids)):
+            self._rows[self._part_ids[index]] = index
+        self._changed()
+        self._emit(PatternChangeKind.PART_REMOVED, part_id)
+        return True
+
+    def set_step(self, part_id: str, step: int, active: bool = True) -> None:
+        """Set or clear one step, adding the part and growing steps as needed"""
+        if step < 0:
+            raise IndexError(f"Step index must not be negative: {step}")
+        if self.is_active(part_id, step) == active:
+            return
+        if part_id not in self._rows:
+            self.add_part(part_id)
+
+        if step >= self.step_capacity:
+            self._grow(step + 1)
+
+        row = self._rows[part_id]
+        delta = 1 if active else -1
+        self._matrix[row, step] = active
+        self._part_counts[row] += delta
+        self._step_counts[step] += delta
+        self._hit_count += delta
+        self._triggers.pop(step, None)
+
+        if active:
+            self._last_step = max(self._last_step, step)
+        elif step == self._last_step and not self._step_counts[step]:
+            self._last_step = self._find_last_step(step)
+        self._changed()
+
+        if active:
+            self._emit(PatternChangeKind.STEP_SET, part_id, step)
+        else:
+            self._emit(PatternChangeKind.STEP_CLEARED, part_id, step)
+
+    def set_steps(self, part_id: str, steps: Iterable[int]) -> None:
+        """Activate many steps of one part with a single vectorized write"""
+        steps = np.asarray(steps, dtype=np.int64)
+        if steps.size == 0:
+            return
+        if steps.min() < 0:
+            raise IndexError(f"Step index must not be negative: {steps.min()}")
+        self.add_part(part_id)
+        if steps.max() >= self.step_capacity:
+            self._grow(int(steps.max()) + 1)
+
+        self._matrix[self._rows[part_id], steps] = True
+        self._recount()
+        self._changed()
+        self._emit(PatternChangeKind.REPLACED, part_id)
+
+    def toggle(self, part_id: str, step: int) -> bool:
+        """Flip one step and return its new state"""
+        active = not self.is_active(part_id, step)
+        self.set_step(part_id, step, active)
+        return active
+
+    def clear(self) -> None:
+        """Deactivate every step while keeping the parts"""
+        self._matrix[:] = False
+        self._reset_counts()
+        self._changed()
+        self._emit(PatternChangeKind.REPLACED)
+
+    def clear_part(self, part_id: str) -> None:
+        """Deactivate every step of one part"""
+        for step in self.get_active_steps(part_id):
+            self.set_step(part_id, step, False)
+
+    def replace_with(self, other: PatternView) -> None:
+        """Take over the contents of another pattern, keeping our listeners"""
+        self._copy_state_from(other)
+        self._changed()
+        self._emit(PatternChangeKind.REPLACED)
+
+    def apply_diff(self, other: PatternView) -> None:
+        """Take over the contents of another pattern, editing only what differs
+
+        With the same parts in the same order, each changed step is set on
+        its own, so listeners see only the steps that actually changed.
+        Other part lists, or diffs too large to be worth it, fall back to
+        replace_with. Either way the step capacity ends up matching other's.
+        """
+        if list(other.part_ids) != self._part_ids:
+            self.replace_with(other)
+            return
+
+        steps = max(self.step_capacity, other.step_capacity)
+        current = np.zeros((len(self._part_ids), steps), dtype=np.bool_)
+        target = np.zeros_like(current)
+        current[:, : self.step_capacity] = self._matrix
+        target[:, : other.step_capacity] = other.matrix
+        rows, columns = np.nonzero(current ^ target)
+        if rows.size > PATTERN_DIFF_MAX_STEP_EDITS:
+            self.replace_with(other)
+            return
+
+        with self.hold_snapshots():
+            for row, step in zip(rows.tolist(), columns.tolist()):
+                self.set_step(self._part_ids[row], step, bool(target[row, step]))
+
+            if self.step_capacity != other.step_capacity:
+                self._resize(other.step_capacity)
+                self._changed()
+
+    def copy(self) -> "Pattern":
+        """Return an independent copy of this pattern without listeners"""
+        clone = Pattern(steps=self.step_capacity)
+        clone._copy_state_from(self)
+        clone._changed()
+        return clone
+
+    @classmethod
+    def from_matrix(cls, part_ids: Iterable[str], matrix: np.ndarray) -> "Pattern":
+        """Build a pattern from part ids and a matching parts × steps matrix"""
+        part_ids = list(part_ids)
+        if matrix.shape[0] != len(part_ids):
+            raise ValueError("Pattern matrix rows do not match the part ids")
+        pattern = cls(steps=matrix.shape[1])
+        pattern._part_ids = part_ids
+        pattern._rows = {part_id: row for row, part_id in enumerate(part_ids)}
+        pattern._matrix = np.array(matrix, dtype=np.bool_)
+        pattern._recount()
+        pattern._changed()
+        return pattern
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Iterable[int]]) -> "Pattern":
+        """Build a pattern from a mapping of part id to active steps"""
+        pattern = cls(data.keys())
+        with pattern.hold_snapshots():
+            for part_id, steps in data.items():
+                for step in steps:
+                    pattern.set_step(part_id, int(step))
+        return pattern
+
+    def _copy_state_from(self, other: PatternView) -> None:
+        self._part_ids = list(other._part_ids)
+        self._rows = dict(other._rows)
+        self._matrix = other._matrix.copy()
+        self._part_counts = other._part_counts.copy()
+        self._step_counts = other._step_counts.copy()
+        self._hit_count = other._hit_count
+        self._last_step = other._last_step
+        self._triggers = dict(other._triggers)
+
+    def _reset_counts(self) -> None:
+        self._part_counts[:] = 0
+        self._step_counts[:] = 0
+        self._hit_count = 0
+        self._last_step = -1
+        self._triggers.clear()
+
+    def _recount(self) -> None:
+        """Recompute all derived state from the matrix after a bulk edit"""
+        self._part_counts = self._matrix.sum(axis=1, dtype=np.int64)
+        self._step_counts = self._matrix.sum(axis=0, dtype=np.int64)
+        self._hit_count = int(self._part_counts.sum())
+        self._last_step = self._find_last_step(self.step_capacity)
+        self._triggers.clear()
+
+    def _find_last_step(self, end: int) -> int:
+        """Find the highest active step below end"""
+        active = np.flatnonzero(self._step_counts[:end])
+        return int(active[-1]) if active.size else -1
+
+    def _grow(self, min_steps: int) -> None:
+        """Widen the matrix to hold at least min_steps columns"""
+        width = self.step_capacity
+        grown = np.zeros((len(self._part_ids), max(min_steps, width * 2)), np.bool_)
+        grown[:, :width] = self._matrix
+        self._matrix = grown
+        self._step_counts = np.append(
+            self._step_counts, np.zeros(grown.shape[1] - width, dtype=np.int64)
+        )
+
+    def _resize(self, steps: int) -> None:
+        """Set the matrix to exactly steps columns; dropped steps must be empty"""
+        width = min(steps, self.step_capacity)
+        resized = np.zeros((len(self._part_ids), steps), np.bool_)
+        resized[:, :width] = self._matrix[:, :width]
+        self._matrix = resized
+        step_counts = np.zeros(steps, dtype=np.int64)
+        step_counts[:width] = self._step_counts[:width]
+        self._step_counts = step_counts
+        self._triggers.clear()
+
+    def _changed(self) -> None:
+        """Count an edit and publish it, unless snapshots are being held"""
+        self._version += 1
+        if not self._hold_depth:
+            self._snapshot = PatternSnapshot(self)
+
+    def _emit(self, kind: PatternChangeKind, part_id=None, step=None) -> None:
+        if not self._listeners:
+            return
+        change = PatternChange(kind, self._version, part_id, step)
+        for listener in list(self._listeners):
+            listener(change)
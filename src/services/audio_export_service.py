@@ -23,8 +23,9 @@ import subprocess
 import logging
 
 from ..utils.export_progress import ExportPhase
+from ..utils.cancellation import ExportCancelled
 from ..config.export_formats import ExportFormatRegistry
-from ..services.audio_renderer import AudioRenderer
+from ..services.audio_renderer import AudioRenderer, MASTER_BUS_ID
 from ..services.file_encoder import AudioEncoder
 
 
@@ -35,14 +36,25 @@ class SampleLoader:
         self.sample_rate = sample_rate
         self.samples = {}
 
-    def load_samples(self, drum_parts):
-        """Load all drum samples into memory from drum parts"""
+    def load_samples(self, drum_parts, progress_callback=None, cancellation_token=None):
+        """Load all drum samples into memory from drum parts
+
+        progress_callback, if given, receives the fraction of parts loaded.
+        Raises ExportCancelled as soon as cancellation_token is cancelled.
+        """
         self.samples = {}
-        for part in drum_parts:
+        for index, part in enumerate(drum_parts):
+            if cancellation_token:
+                cancellation_token.raise_if_cancelled()
+            if progress_callback:
+                progress_callback(index / len(drum_parts))
             if os.path.exists(part.file_path):
                 try:
-                    audio_data = self._load_sample(part.file_path)
+                    audio_data = self._load_sample(part.file_path, cancellation_token)
                     self.samples[part.id] = audio_data
+                except ExportCancelled:
+                    self.clear_samples()
+                    raise
                 except Exception as e:
                     logging.warning(f"Could not load {part.file_path}: {e}")
                     self.samples[part.id] = np.zeros((1000, 2), dtype="float32")
@@ -51,7 +63,7 @@ class SampleLoader:
         """Clear loaded samples from memory"""
         self.samples = {}
 
-    def _load_sample(self, sample_path):
+    def _load_sample(self, sample_path, cancellation_token=None):
         """Load a single audio sample using ffmpeg"""
         cmd = [
             "ffmpeg",
@@ -65,8 +77,27 @@ class SampleLoader:
             str(self.sample_rate),
             "-",
         ]
-        result = subprocess.run(cmd, capture_output=True, check=True)
-        audio_data = np.frombuffer(result.stdout, dtype=np.float32)
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        process_key = f"decode:{sample_path}"
+        if cancellation_token:
+            cancellation_token.register_process(process_key, process)
+        try:
+            stdout, stderr = process.communicate()
+        finally:
+            if cancellation_token:
+                cancellation_token.unregister_process(process_key)
+
+        if cancellation_token:
+            cancellation_token.raise_if_cancelled()
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, cmd, stdout, stderr)
+
+        audio_data = np.frombuffer(stdout, dtype=np.float32)
         return audio_data.reshape(-1, 2)
 
     def get_samples(self):
@@ -75,85 +106,312 @@ class SampleLoader:
 
 
 class AudioExportService:
-    """Handles audio export functionality with progress tracking"""
+    """Handles audio export functionality with progress tracking
+
+    Every export loads its samples into its own SampleLoader and
+    AudioRenderer, so several exports can run at the same time.
+    """
 
     def __init__(self, window):
         self.window = window
         self.sample_rate = 44100
 
-        # Initialize components (samples loaded lazily during export)
-        self.sample_loader = SampleLoader(self.sample_rate)
-        self.audio_renderer = AudioRenderer({}, self.sample_rate)
         self.format_registry = ExportFormatRegistry()
         self.audio_encoder = AudioEncoder(self.format_registry)
 
     def export_audio(
         self,
-        drum_parts_state,
+        pattern,
         bpm,
         file_path,
         progress_callback,
         repeat_count=1,
         metadata=None,
         export_task=None,
+        total_beats=None,
     ):
         """
         Export drum pattern to audio file
 
         Args:
-            drum_parts_state: Current drum pattern state
+            pattern: Current drum pattern state
             bpm: Beats per minute
             file_path: Output file path
             progress_callback: Callback function for progress updates
             repeat_count: Number of times to repeat the pattern
             metadata: Dict with artist, title, and cover_art keys
+            total_beats: Pattern length, defaults to the current pattern's
         """
+        cancellation_token = self._get_cancellation_token(export_task)
+        renderer = None
         try:
-            progress_callback(ExportPhase.PREPARING)
-
-            # Load samples fresh from current drum parts (ensures latest files)
-            drum_parts = self.window.sound_service.drum_part_manager.get_all_parts()
-            self.sample_loader.load_samples(drum_parts)
-            # Update the renderer with the loaded samples
-            self.audio_renderer.update_samples(self.sample_loader.get_samples())
-
-            self._validate_pattern(drum_parts_state)
+            renderer = self._prepare_renderer(
+                pattern, progress_callback, cancellation_token
+            )
 
             progress_callback(ExportPhase.RENDERING)
-            total_beats = self.window.drum_machine_service.total_beats
-            audio_buffer = self.audio_renderer.render_pattern(
-                drum_parts_state, bpm, total_beats, repeat_count
+            audio_buffer = renderer.render_pattern(
+                pattern,
+                bpm,
+                self._get_total_beats(total_beats),
+                repeat_count,
+                self._phase_progress(progress_callback, ExportPhase.RENDERING),
+                cancellation_token,
             )
 
             progress_callback(ExportPhase.SAVING)
             self.audio_encoder.encode_to_file(
-                audio_buffer.buffer, self.sample_rate, file_path, metadata, export_task
+                audio_buffer.buffer,
+                self.sample_rate,
+                file_path,
+                metadata,
+                export_task,
+                self._phase_progress(progress_callback, ExportPhase.SAVING),
             )
 
-            # Clear samples from memory after export
-            self.sample_loader.clear_samples()
-            self.audio_renderer.clear_samples()
-
             logging.info(f"Audio exported successfully to {file_path}")
             return True
 
         except ValueError as e:
             logging.warning(f"Export validation failed: {e}")
-            # Clear samples even on error
-            self.sample_loader.clear_samples()
-            self.audio_renderer.clear_samples()
+            raise
+        except ExportCancelled:
+            logging.info("Export cancelled")
             raise
         except Exception as e:
             logging.error(f"Export failed: {e}")
-            # Clear samples even on error
-            self.sample_loader.clear_samples()
-            self.audio_renderer.clear_samples()
             raise
+        finally:
+            # Clear samples from memory after export, even on error
+            if renderer:
+                renderer.clear_samples()
 
-    def _validate_pattern(self, drum_parts_state):
-        """Validate that the pattern has active beats"""
-        has_beats = any(
-            any(part_state.values()) for part_state in drum_parts_state.values()
+    def export_audio_multi(
+        self,
+        pattern,
+        bpm,
+        file_paths,
+        progress_callback,
+        repeat_count=1,
+        metadata=None,
+        export_task=None,
+        target_callback=None,
+        total_beats=None,
+    ):
+        """
+        Export drum pattern to several audio files with a single render
+
+        The pattern is decoded and rendered once, then every target is
+        encoded concurrently from the same buffer.
+
+        Args:
+            pattern: Current drum pattern state
+            bpm: Beats per minute
+            file_paths: Output file paths, one per target format
+            progress_callback: Callback function for progress updates
+            repeat_count: Number of times to repeat the pattern
+            metadata: Dict with artist, title, and cover_art keys
+            target_callback: Callback receiving (file_path, ExportTargetStatus)
+            total_beats: Pattern length, defaults to the current pattern's
+
+        Returns:
+            Dict mapping each file path to True if it was written successfully
+        """
+        cancellation_token = self._get_cancellation_token(export_task)
+        renderer = None
+        try:
+            renderer = self._prepare_renderer(
+                pattern, progress_callback, cancellation_token
+            )
+
+            progress_callback(ExportPhase.RENDERING)
+            audio_buffer = renderer.render_pattern(
+                pattern,
+                bpm,
+                self._get_total_beats(total_beats),
+                repeat_count,
+                self._phase_progress(progress_callback, ExportPhase.RENDERING),
+                cancellation_token,
+            )
+
+            progress_callback(ExportPhase.SAVING)
+            results = self.audio_encoder.encode_to_files(
+                audio_buffer.buffer,
+                self.sample_rate,
+                file_paths,
+                metadata,
+                export_task,
+                target_callback,
+                self._phase_progress(progress_callback, ExportPhase.SAVING),
+            )
+
+            written = [path for path, success in results.items() if success]
+            logging.info(f"Audio exported successfully to {', '.join(written)}")
+            return results
+
+        except ValueError as e:
+            logging.warning(f"Export validation failed: {e}")
+            raise
+        except ExportCancelled:
+            logging.info("Multi-target export cancelled")
+            raise
+        except Exception as e:
+            logging.error(f"Multi-target export failed: {e}")
+            raise
+        finally:
+            if renderer:
+                renderer.clear_samples()
+
+    def export_stems(
+        self,
+        pattern,
+        bpm,
+        file_path,
+        progress_callback,
+        repeat_count=1,
+        metadata=None,
+        export_task=None,
+        target_callback=None,
+        include_master=True,
+        total_beats=None,
+    ):
+        """
+        Export one audio file per drum part from a single render pass
+
+        Stems are written next to file_path as "<name> - <part><ext>", and the
+        summed master mix is written to file_path itself if requested.
+
+        Args:
+            pattern: Current drum pattern state
+            bpm: Beats per minute
+            file_path: Output file path of the master mix
+            progress_callback: Callback function for progress updates
+            repeat_count: Number of times to repeat the pattern
+            metadata: Dict with artist, title, and cover_art keys
+            target_callback: Callback receiving (file_path, ExportTargetStatus)
+            include_master: Whether to write the summed mix as well
+            total_beats: Pattern length, defaults to the current pattern's
+
+        Returns:
+            Dict mapping each file path to True if it was written successfully
+        """
+        cancellation_token = self._get_cancellation_token(export_task)
+        renderer = None
+        try:
+            renderer = self._prepare_renderer(
+                pattern, progress_callback, cancellation_token
+            )
+
+            progress_callback(ExportPhase.RENDERING)
+            buses = renderer.render_stems(
+                pattern,
+                bpm,
+                self._get_total_beats(total_beats),
+                repeat_count,
+                include_master,
+                self._phase_progress(progress_callback, ExportPhase.RENDERING),
+                cancellation_token,
+            )
+
+            progress_callback(ExportPhase.SAVING)
+            stem_paths = self._get_stem_paths(file_path, buses)
+            targets = {
+                stem_paths[bus_id]: bus.buffer for bus_id, bus in buses.items()
+            }
+            results = self.audio_encoder.encode_targets(
+                targets,
+                self.sample_rate,
+                metadata,
+                export_task,
+                target_callback,
+                self._phase_progress(progress_callback, ExportPhase.SAVING),
+            )
+
+            logging.info(f"Exported {len(targets)} stems for {file_path}")
+            return results
+
+        except ValueError as e:
+            logging.warning(f"Export validation failed: {e}")
+            raise
+        except ExportCancelled:
+            logging.info("Stem export cancelled")
+            raise
+        except Exception as e:
+            logging.error(f"Stem export failed: {e}")
+            raise
+        finally:
+            if renderer:
+                renderer.clear_samples()
+
+    def _get_stem_paths(self, file_path, bus_ids):
+        """Get a distinct output path for the stem of each bus
+
+        Parts may share a display name, so repeated paths get a number
+        appended instead of overwriting each other.
+        """
+        stem_paths = {}
+        used_paths = set()
+        for bus_id in bus_ids:
+            stem_path = self._get_stem_path(file_path, bus_id)
+            base_path, ext = os.path.splitext(stem_path)
+            number = 2
+            while stem_path in used_paths:
+                stem_path = f"{base_path} ({number}){ext}"
+                number += 1
+            used_paths.add(stem_path)
+            stem_paths[bus_id] = stem_path
+        return stem_paths
+
+    def _get_stem_path(self, file_path, bus_id):
+        """Get the output path of the stem for a bus"""
+        if bus_id == MASTER_BUS_ID:
+            return file_path
+
+        drum_part_manager = self.window.sound_service.drum_part_manager
+        part = drum_part_manager.get_part_by_id(bus_id)
+        part_name = part.name if part else bus_id
+        part_name = part_name.replace(os.sep, "_")
+
+        base_path, ext = os.path.splitext(file_path)
+        return f"{base_path} - {part_name}{ext}"
+
+    def _get_cancellation_token(self, export_task):
+        """Get the token that cancels every stage of the given export"""
+        return export_task.cancellation_token if export_task else None
+
+    def _get_total_beats(self, total_beats):
+        if total_beats is None:
+            return self.window.drum_machine_service.total_beats
+        return total_beats
+
+    def _prepare_renderer(
+        self, pattern, progress_callback, cancellation_token=None
+    ):
+        """Load the current drum samples into a renderer for one export"""
+        progress_callback(ExportPhase.PREPARING)
+
+        # Load samples fresh from current drum parts (ensures latest files)
+        drum_parts = self.window.sound_service.drum_part_manager.get_all_parts()
+        sample_loader = SampleLoader(self.sample_rate)
+        sample_loader.load_samples(
+            drum_parts,
+            self._phase_progress(progress_callback, ExportPhase.PREPARING),
+            cancellation_token,
         )
-        if not has_beats:
+        renderer = AudioRenderer(sample_loader.get_samples(), self.sample_rate)
+
+        try:
+            self._validate_pattern(pattern)
+        except ValueError:
+            renderer.clear_samples()
+            raise
+        return renderer
+
+    def _phase_progress(self, progress_callback, phase):
+        """Bind a phase to the progress callback for stage-level reporting"""
+        return lambda fraction: progress_callback(phase, fraction)
+
+    def _validate_pattern(self, pattern):
+        """Validate that the pattern has active beats"""
+        if not pattern.any_active():
             raise ValueError("No active beats in pattern")
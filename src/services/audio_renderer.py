@@ -19,11 +19,16 @@
 
 import logging
 import numpy as np
+from typing import Dict
+from ..models.pattern import PatternView
 from ..config.constants import (
     GROUP_TOGGLE_COUNT,
     DEFAULT_FALLBACK_SAMPLE_SIZE,
 )
 
+# Key of the summed mix in the buses returned by render_stems
+MASTER_BUS_ID = "master"
+
 
 class AudioBuffer:
     """Manages audio buffer operations"""
@@ -59,6 +64,19 @@ class AudioBuffer:
             logging.error(f"Failed to add sample at position {start_sample}: {e}")
             raise
 
+    def peak(self) -> float:
+        """Get the highest absolute amplitude in the buffer"""
+        if self.buffer is None or len(self.buffer) == 0:
+            return 0.0
+        return float(np.max(np.abs(self.buffer)))
+
+    def scale(self, gain: float):
+        """Multiply the buffer by a constant gain in place"""
+        if self.buffer is None:
+            logging.warning("Attempted to scale uninitialized buffer")
+            return
+        self.buffer *= gain
+
     def normalize(self):
         """Normalize the audio buffer"""
         if self.buffer is None:
@@ -66,9 +84,9 @@ class AudioBuffer:
             return
 
         try:
-            max_amplitude = np.max(np.abs(self.buffer))
+            max_amplitude = self.peak()
             if max_amplitude > 0:
-                self.buffer[:] = self.buffer / max_amplitude * 0.95
+                self.scale(0.95 / max_amplitude)
         except (ValueError, RuntimeError) as e:
             logging.error(f"Failed to normalize audio buffer: {e}")
             raise
@@ -90,14 +108,14 @@ class AudioRenderer:
         self.samples = {}
 
     def calculate_pattern_duration(
-        self, drum_parts_state, bpm: int, repeat_count: int, total_beats: int
+        self, pattern: PatternView, bpm: int, repeat_count: int, total_beats: int
     ) -> float:
         """Calculate total export duration including repeats"""
         subdivisions_per_second = (bpm / 60) * GROUP_TOGGLE_COUNT
         pattern_duration_seconds = total_beats / subdivisions_per_second
 
         latest_sample_end_time = self._find_latest_sample_end_time(
-            drum_parts_state, subdivisions_per_second
+            pattern, subdivisions_per_second
         )
 
         extra_time_to_add = (
@@ -107,48 +125,134 @@ class AudioRenderer:
         return (pattern_duration_seconds * repeat_count) + extra_time_to_add
 
     def render_pattern(
-        self, drum_parts_state, bpm: int, total_beats: int, repeat_count: int
+        self,
+        pattern: PatternView,
+        bpm: int,
+        total_beats: int,
+        repeat_count: int,
+        progress_callback=None,
+        cancellation_token=None,
     ) -> AudioBuffer:
-        """Render drum pattern into an audio buffer"""
+        """Render drum pattern into an audio buffer
+
+        progress_callback, if given, receives the fraction of mixed blocks.
+        Raises ExportCancelled between blocks once cancellation_token is set.
+        """
         duration = self.calculate_pattern_duration(
-            drum_parts_state, bpm, repeat_count, total_beats
+            pattern, bpm, repeat_count, total_beats
         )
 
         audio_buffer = AudioBuffer(self.sample_rate)
         audio_buffer.create_buffer(duration)
 
+        self._mix_pattern(
+            pattern,
+            bpm,
+            total_beats,
+            repeat_count,
+            lambda part_id: audio_buffer,
+            progress_callback,
+            cancellation_token,
+        )
+
+        audio_buffer.normalize()
+        return audio_buffer
+
+    def render_stems(
+        self,
+        pattern: PatternView,
+        bpm: int,
+        total_beats: int,
+        repeat_count: int,
+        include_master: bool = False,
+        progress_callback=None,
+        cancellation_token=None,
+    ) -> Dict[str, AudioBuffer]:
+        """Render every active drum part into its own buffer in a single pass
+
+        All buses share one gain so that the stems still add up to the
+        normalized master mix.
+
+        Returns:
+            Dict mapping part ids (and MASTER_BUS_ID if requested) to buffers
+        """
+        duration = self.calculate_pattern_duration(
+            pattern, bpm, repeat_count, total_beats
+        )
+
+        buses = {}
+        for part_id in pattern.get_active_parts():
+            buses[part_id] = AudioBuffer(self.sample_rate)
+            buses[part_id].create_buffer(duration)
+
+        self._mix_pattern(
+            pattern,
+            bpm,
+            total_beats,
+            repeat_count,
+            buses.get,
+            progress_callback,
+            cancellation_token,
+        )
+
+        master = AudioBuffer(self.sample_rate)
+        master.create_buffer(duration)
+        for bus in buses.values():
+            master.buffer += bus.buffer
+
+        max_amplitude = master.peak()
+        if max_amplitude > 0:
+            gain = 0.95 / max_amplitude
+            for bus in buses.values():
+                bus.scale(gain)
+            master.scale(gain)
+
+        if include_master:
+            buses[MASTER_BUS_ID] = master
+        return buses
+
+    def _mix_pattern(
+        self,
+        pattern: PatternView,
+        bpm: int,
+        total_beats: int,
+        repeat_count: int,
+        get_bus,
+        progress_callback=None,
+        cancellation_token=None,
+    ):
+        """Mix all repeats of the pattern, routing each part to get_bus(part_id)
+
+        Each subdivision of each repeat is one block of work, and cancellation
+        is checked before every block.
+        """
         subdivisions_per_second = (bpm / 60) * GROUP_TOGGLE_COUNT
         samples_per_subdivision = int(self.sample_rate / subdivisions_per_second)
         pattern_duration_seconds = total_beats / subdivisions_per_second
+        total_blocks = max(1, repeat_count * total_beats)
+        blocks_done = 0
 
         for repeat in range(repeat_count):
             repeat_offset = repeat * int(pattern_duration_seconds * self.sample_rate)
-            self._render_repeat(
-                drum_parts_state,
-                audio_buffer,
-                repeat_offset,
-                samples_per_subdivision,
-                total_beats,
-            )
-
-        audio_buffer.normalize()
-        return audio_buffer
+            for subdivision in range(total_beats):
+                if cancellation_token:
+                    cancellation_token.raise_if_cancelled()
+                start_sample = repeat_offset + (subdivision * samples_per_subdivision)
+                self._add_subdivision_samples(
+                    pattern, get_bus, subdivision, start_sample
+                )
+                blocks_done += 1
+                if progress_callback:
+                    progress_callback(blocks_done / total_blocks)
 
     def _find_latest_sample_end_time(
-        self, drum_parts_state, subdivisions_per_second: float
+        self, pattern: PatternView, subdivisions_per_second: float
     ) -> float:
         """Find the latest time any sample will finish playing"""
         latest_sample_end_time = 0
 
-        for part_id, part_state in drum_parts_state.items():
-            if not part_state:
-                continue
-
-            active_subdivisions = [sub for sub, active in part_state.items() if active]
-            if not active_subdivisions:
-                continue
-
-            last_subdivision = max(active_subdivisions)
+        for part_id in pattern.get_active_parts():
+            last_subdivision = pattern.last_active_step(part_id)
             trigger_time = last_subdivision / subdivisions_per_second
             sample_length_seconds = (
                 len(self.samples.get(part_id, [])) / self.sample_rate
@@ -158,32 +262,16 @@ class AudioRenderer:
 
         return latest_sample_end_time
 
-    def _render_repeat(
-        self,
-        drum_parts_state,
-        audio_buffer: AudioBuffer,
-        repeat_offset: int,
-        samples_per_subdivision: int,
-        total_beats: int,
-    ):
-        """Render a single repeat of the pattern"""
-        for subdivision in range(total_beats):
-            start_sample = repeat_offset + (subdivision * samples_per_subdivision)
-            self._add_subdivision_samples(
-                drum_parts_state, audio_buffer, subdivision, start_sample
-            )
-
     def _add_subdivision_samples(
         self,
-        drum_parts_state,
-        audio_buffer: AudioBuffer,
+        pattern: PatternView,
+        get_bus,
         subdivision: int,
         start_sample: int,
     ):
         """Add samples for all active drum parts at this subdivision"""
-        for part_id, part_state in drum_parts_state.items():
-            if part_state.get(subdivision, False):
-                sample_data = self.samples.get(
-                    part_id, np.zeros(DEFAULT_FALLBACK_SAMPLE_SIZE)
-                )
-                audio_buffer.add_sample(sample_data, start_sample)
+        for part_id in pattern.get_parts_at_step(subdivision):
+            sample_data = self.samples.get(
+                part_id, np.zeros(DEFAULT_FALLBACK_SAMPLE_SIZE)
+            )
+            get_bus(part_id).add_sample(sample_data, start_sample)
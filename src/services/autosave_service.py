@@ -0,0 +1,280 @@
+# services/autosave_service.py
+#
+# Copyright 2025 revisto
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import os
+import json
+import queue
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+from gi.repository import GLib
+from ..config.constants import (
+    USER_DATA_DIR_NAME,
+    AUTOSAVE_FSYNC_INTERVAL_SECONDS,
+    AUTOSAVE_COMPACT_RECORDS,
+)
+from ..models.drum_part import DrumPart
+from ..models.pattern import PatternChange, PatternChangeKind
+from ..utils.project_file import (
+    PROJECT_EXTENSION,
+    ProjectData,
+    read_project,
+    write_project,
+)
+
+JOURNAL_FILENAME = "autosave.journal"
+SNAPSHOT_PREFIX = "autosave-"
+
+# Kinds of work items handled by the journal writer thread
+_RECORD = "record"
+_CHECKPOINT = "checkpoint"
+_STOP = "stop"
+
+
+class AutosaveService:
+    """Journals every edit so a crashed session can be recovered
+
+    Edits are appended to a journal as small JSON records and flushed to
+    disk in batches by a background thread. Every so often the whole
+    session is compacted into a numbered snapshot and the journal restarts
+    empty. The journal's first line names the snapshot it continues, so
+    records are only replayed onto the snapshot they were written after.
+    """
+
+    def __init__(self, window, autosave_dir: Optional[str] = None) -> None:
+        self.window = window
+        self.autosave_dir = autosave_dir or os.path.join(
+            GLib.get_user_data_dir(), USER_DATA_DIR_NAME, "autosave"
+        )
+        self.journal_path = os.path.join(self.autosave_dir, JOURNAL_FILENAME)
+        self._queue: queue.Queue = queue.Queue()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._generation = 0
+        self._records_since_checkpoint = 0
+
+    def recover(self) -> Optional[ProjectData]:
+        """Rebuild the session left behind by a crash, if there is one"""
+        snapshots = self._find_snapshots()
+        if not snapshots:
+            return None
+
+        latest = max(snapshots)
+        try:
+            project = read_project(snapshots[latest])
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Failed to read autosave snapshot: {e}")
+            return None
+
+        generation, records = self._read_journal()
+        # A newer snapshot than the journal means compaction was interrupted
+        # after the snapshot was written; it already contains every record
+        if generation == latest:
+            self._replay(project, records)
+        logging.info(f"Recovered autosave with {len(records)} journal records")
+        return project
+
+    def start(self) -> None:
+        """Discard any previous autosave and start journaling this session"""
+        self._remove_files()
+        self.window.drum_machine_service.pattern.add_listener(self._on_pattern_changed)
+        self.window.sound_service.drum_part_manager.add_listener(
+            self._on_parts_changed
+        )
+        self._thread = threading.Thread(target=self._run_writer, daemon=True)
+        self._thread.start()
+        self.checkpoint()
+
+    def shutdown(self) -> None:
+        """Stop journaling and delete the autosave after a clean exit"""
+        if not self._thread:
+            return
+        self._stop_event.set()
+        self._queue.put((_STOP, None))
+        self._thread.join()
+        self._thread = None
+        self._remove_files()
+
+    def record_bpm(self, bpm: float) -> None:
+        self._append({"t": "bpm", "v": bpm})
+
+    def checkpoint(self) -> None:
+        """Queue a compaction of the current session into a new snapshot"""
+        if not self._thread:
+            return
+        drum_machine_service = self.window.drum_machine_service
+        manager = self.window.sound_service.drum_part_manager
+        parts = manager.get_all_parts()
+        snapshot = drum_machine_service.pattern.publish_snapshot()
+        self._records_since_checkpoint = 0
+        self._queue.put((_CHECKPOINT, (drum_machine_service.bpm, parts, snapshot)))
+
+    def _on_pattern_changed(self, change: PatternChange) -> None:
+        if change.kind in (PatternChangeKind.STEP_SET, PatternChangeKind.STEP_CLEARED):
+            active = int(change.kind == PatternChangeKind.STEP_SET)
+            self._append(
+                {"t": "step", "p": change.part_id, "s": change.step, "v": active}
+            )
+        elif change.kind == PatternChangeKind.REPLACED:
+            self.checkpoint()
+
+    def _on_parts_changed(self, version: int) -> None:
+        parts = self.window.sound_service.drum_part_manager.get_all_parts()
+        self._append({"t": "parts", "v": [part.to_dict() for part in parts]})
+
+    def _append(self, record: dict) -> None:
+        if not self._thread:
+            return
+        self._queue.put((_RECORD, json.dumps(record, separators=(",", ":")) + "\n"))
+        self._records_since_checkpoint += 1
+        if self._records_since_checkpoint >= AUTOSAVE_COMPACT_RECORDS:
+            self.checkpoint()
+
+    def _run_writer(self) -> None:
+        """Write queued work in batches with one fsync per batch"""
+        journal = None
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopping = any(kind == _STOP for kind, _ in batch)
+            try:
+                journal = self._write_batch(journal, batch)
+            except OSError as e:
+                logging.warning(f"Failed to write autosave journal: {e}")
+
+            if not stopping:
+                self._stop_event.wait(AUTOSAVE_FSYNC_INTERVAL_SECONDS)
+
+        if journal:
+            journal.close()
+
+    def _write_batch(self, journal, batch):
+        for kind, payload in batch:
+            if kind == _CHECKPOINT:
+                journal = self._write_checkpoint(journal, payload)
+            elif kind == _RECORD and journal:
+                journal.write(payload)
+
+        if journal:
+            journal.flush()
+            os.fsync(journal.fileno())
+        return journal
+
+    def _write_checkpoint(self, journal, payload):
+        """Write a new snapshot and restart the journal on top of it"""
+        bpm, parts, snapshot = payload
+        generation = self._generation + 1
+        os.makedirs(self.autosave_dir, exist_ok=True)
+        write_project(
+            self._get_snapshot_path(generation), bpm, parts, snapshot, sync=True
+        )
+
+        temp_path = f"{self.journal_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as new_journal:
+            new_journal.write(json.dumps({"generation": generation}) + "\n")
+            new_journal.flush()
+            os.fsync(new_journal.fileno())
+        os.replace(temp_path, self.journal_path)
+        new_journal = open(self.journal_path, "a", encoding="utf-8")
+        if journal:
+            journal.close()
+        self._generation = generation
+
+        for old_generation, path in self._find_snapshots().items():
+            if old_generation < generation:
+                os.remove(path)
+        return new_journal
+
+    def _read_journal(self) -> Tuple[Optional[int], List[dict]]:
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as journal:
+                lines = journal.read().splitlines()
+            generation = json.loads(lines[0])["generation"]
+        except (OSError, ValueError, KeyError, IndexError):
+            return None, []
+
+        records = []
+        for line in lines[1:]:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # The last write was cut short by the crash
+                break
+        return generation, records
+
+    def _replay(self, project: ProjectData, records: List[dict]) -> None:
+        """Apply journal records on top of a snapshot"""
+        try:
+            for record in records:
+                kind = record["t"]
+                if kind == "step":
+                    active = bool(record["v"])
+                    project.pattern.set_step(record["p"], record["s"], active)
+                elif kind == "bpm":
+                    project.bpm = record["v"]
+                elif kind == "parts":
+                    self._replay_parts(project, record["v"])
+        except (KeyError, TypeError, IndexError) as e:
+            logging.warning(f"Stopped replaying a malformed autosave record: {e}")
+
+    def _replay_parts(self, project: ProjectData, part_dicts: List[dict]) -> None:
+        parts = [DrumPart.from_dict(part) for part in part_dicts]
+        part_ids = {part.id for part in parts}
+        for part_id in project.pattern.part_ids:
+            if part_id not in part_ids:
+                project.pattern.remove_part(part_id)
+        for part in parts:
+            project.pattern.add_part(part.id)
+        project.parts = parts
+
+    def _get_snapshot_path(self, generation: int) -> str:
+        return os.path.join(
+            self.autosave_dir, f"{SNAPSHOT_PREFIX}{generation}{PROJECT_EXTENSION}"
+        )
+
+    def _find_snapshots(self) -> Dict[int, str]:
+        snapshots = {}
+        try:
+            file_names = os.listdir(self.autosave_dir)
+        except OSError:
+            return snapshots
+        for file_name in file_names:
+            stem, extension = os.path.splitext(file_name)
+            if extension != PROJECT_EXTENSION or not stem.startswith(SNAPSHOT_PREFIX):
+                continue
+            generation = stem.replace(SNAPSHOT_PREFIX, "", 1)
+            if generation.isdigit():
+                snapshots[int(generation)] = os.path.join(self.autosave_dir, file_name)
+        return snapshots
+
+    def _remove_files(self) -> None:
+        paths = list(self._find_snapshots().values()) + [self.journal_path]
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logging.warning(f"Failed to remove autosave file {path}: {e}")
@@ -20,15 +20,17 @@
 import threading
 import time
 import logging
-from typing import Dict, Optional
+from typing import Optional
 from gi.repository import GLib
 from ..interfaces.player import IPlayer
+from ..models.pattern import Pattern, PatternChange
 from ..config.constants import (
     NUM_TOGGLES,
     GROUP_TOGGLE_COUNT,
     DEFAULT_BPM,
     DEFAULT_VOLUME,
 )
+from ..utils.project_file import ProjectData, read_project, write_project
 from .pattern_service import PatternService
 from .ui_helper import UIHelper
 
@@ -43,20 +45,21 @@ class DrumMachineService(IPlayer):
         self.last_volume: float = DEFAULT_VOLUME
         self.play_thread: Optional[threading.Thread] = None
         self.stop_event: threading.Event = threading.Event()
-        self.drum_parts_state: Dict[str, Dict[int, bool]] = (
-            self.create_empty_drum_parts_state()
-        )
+        self.pattern: Pattern = self.create_empty_pattern()
         self.pattern_service = PatternService(window)
         self.total_beats: int = NUM_TOGGLES
         self.beats_per_page: int = NUM_TOGGLES
         self.active_pages: int = 1
         self.playing_beat: int = -1
+        self.pattern.add_listener(self._on_pattern_changed)
 
-    def create_empty_drum_parts_state(self) -> Dict[str, Dict[int, bool]]:
+    def create_empty_pattern(self) -> Pattern:
         # Get drum parts from sound service
         drum_parts = self.sound_service.drum_part_manager.get_all_parts()
-        drum_parts_state = {part.id: dict() for part in drum_parts}
-        return drum_parts_state
+        return Pattern(part.id for part in drum_parts)
+
+    def _on_pattern_changed(self, change: PatternChange) -> None:
+        self.update_total_beats()
 
     def play(self) -> None:
         self.playing = True
@@ -79,13 +82,10 @@ class DrumMachineService(IPlayer):
         Calculates the total number of beats and active pages
         based on the highest active toggle.
         """
-        max_beat = 0
-        for part_state in self.drum_parts_state.values():
-            if part_state:  # Check if the instrument has any active toggles
-                max_beat = max(max_beat, *part_state.keys())
+        max_beat = self.pattern.last_active_step()
 
         # If the pattern is completely empty, default to one page.
-        if max_beat == 0 and not any(self.drum_parts_state.values()):
+        if max_beat < 0:
             num_pages = 1
         else:
             # Calculate pages needed for the highest beat.
@@ -103,19 +103,62 @@ class DrumMachineService(IPlayer):
             self.last_volume = volume
 
     def clear_all_toggles(self) -> None:
-        self.drum_parts_state = self.create_empty_drum_parts_state()
-        self.ui_helper.deactivate_all_toggles_in_ui()
+        self.pattern.replace_with(self.create_empty_pattern())
 
     def save_pattern(self, file_path: str) -> None:
-        self.pattern_service.save_pattern(file_path, self.drum_parts_state, self.bpm)
+        self.pattern_service.save_pattern(file_path, self.pattern, self.bpm)
 
     def load_pattern(self, file_path: str) -> None:
-        self.ui_helper.deactivate_all_toggles_in_ui()
-        self.drum_parts_state, self.bpm = self.pattern_service.load_pattern(file_path)
+        with self.window.history_service.record_session():
+            pattern, bpm = self.pattern_service.load_pattern(file_path)
+            self._apply_loaded_pattern(pattern, bpm)
+
+    def save_project(self, file_path: str) -> None:
+        """Save the pattern, drum parts and BPM as a native project"""
+        write_project(
+            file_path,
+            self.bpm,
+            self.sound_service.drum_part_manager.get_all_parts(),
+            self.pattern.publish_snapshot(),
+        )
+        logging.info(f"Project saved successfully to {file_path}")
+
+    def load_project(self, file_path: str) -> None:
+        """Restore a native project, including its drum parts and samples"""
+        # Read before touching any state so a bad file leaves the session intact
+        project = read_project(file_path)
+        with self.window.history_service.record_session():
+            self.restore_project(project)
+        logging.info(f"Project loaded successfully from {file_path}")
+
+    def restore_project(self, project: ProjectData) -> None:
+        """Replace the drum parts, pattern and BPM with those of a project"""
+        for part in project.parts:
+            project.pattern.add_part(part.id)
+
+        self.sound_service.drum_part_manager.set_parts(project.parts)
+        # Decode off the GTK thread; a newer load supersedes this one
+        self.sound_service.load_sounds_async()
+        self._apply_loaded_pattern(project.pattern, project.bpm)
 
-        # Refresh UI to show new temporary parts
-        self.window.drum_grid_builder.rebuild_drum_parts_column()
-        self.window.drum_grid_builder.rebuild_carousel()
+    def load_library_entry(self, entry) -> None:
+        """Load a pattern from its pre-parsed pattern library entry"""
+        with self.window.history_service.record_session():
+            pattern = self.pattern_service.build_pattern(entry.hits)
+            self._apply_loaded_pattern(pattern, entry.bpm)
+
+    def _apply_loaded_pattern(self, pattern: Pattern, bpm: float) -> None:
+        self.bpm = bpm
+        # Only the steps that differ are edited, so the step grids redraw
+        # just the pages they are on
+        self.pattern.apply_diff(pattern)
+
+        # Add buttons for new temporary parts; the column is only rebuilt if
+        # the existing parts changed
+        drum_grid_builder = self.window.drum_grid_builder
+        drum_grid_builder.sync_drum_parts_column()
+        drum_grid_builder.reset_carousel_pages()
+        self.ui_helper.scroll_carousel_to_page(0)
 
         self.ui_helper.set_bpm_in_ui(self.bpm)
 
@@ -130,7 +173,7 @@ class DrumMachineService(IPlayer):
                 break
 
             # Highlight the current beat (this will also de-highlight the previous one)
-            self.ui_helper.highlight_playhead_at_beat(current_beat)
+            GLib.idle_add(self.ui_helper.highlight_playhead_at_beat, current_beat)
             self.playing_beat = current_beat
 
             if current_beat % self.beats_per_page == 0 or current_beat == 0:
@@ -138,10 +181,9 @@ class DrumMachineService(IPlayer):
                 GLib.idle_add(self.ui_helper.scroll_carousel_to_page, target_page)
 
             # Play sounds for the current beat
-            drum_parts = self.sound_service.drum_part_manager.get_all_parts()
-            for part in drum_parts:
-                if self.drum_parts_state[part.id].get(current_beat, False):
-                    self.sound_service.play_sound(part.id)
+            pattern = self.pattern.snapshot
+            for part_id in pattern.get_parts_at_step(current_beat):
+                self.sound_service.play_sound(part_id)
 
             # Wait for the next beat
             delay_per_step = 60 / self.bpm / GROUP_TOGGLE_COUNT
@@ -162,28 +204,30 @@ class DrumMachineService(IPlayer):
 
     def add_drum_part_state(self, part_id: str) -> None:
         """Add a new drum part to the state"""
-        self.drum_parts_state[part_id] = {}
+        self.pattern.add_part(part_id)
 
     def add_new_drum_part(self, file_path: str, name: str) -> Optional[object]:
         """Add a new drum part from an audio file"""
-        new_part = self.sound_service.drum_part_manager.add_custom_part(name, file_path)
-        if new_part:
-            # Reload sounds
-            self.sound_service.reload_sounds()
-            # Add to drum machine state
-            self.add_drum_part_state(new_part.id)
-            # Update UI
-            self.window.drum_grid_builder.add_drum_part(new_part)
-            return new_part
-        return None
+        drum_part_manager = self.sound_service.drum_part_manager
+        with self.window.history_service.record_session():
+            new_part = drum_part_manager.add_custom_part(name, file_path)
+            if new_part:
+                # Reload sounds
+                self.sound_service.reload_sounds()
+                # Add to drum machine state
+                self.add_drum_part_state(new_part.id)
+                # Update UI
+                self.window.drum_grid_builder.add_drum_part(new_part)
+        return new_part
 
     def replace_drum_part(
         self, drum_id: str, file_path: str, name: str
     ) -> Optional[object]:
         """Replace an existing drum part with a new audio file"""
-        result = self.sound_service.drum_part_manager.replace_part(
-            drum_id, file_path, name
-        )
+        with self.window.history_service.record_session():
+            result = self.sound_service.drum_part_manager.replace_part(
+                drum_id, file_path, name
+            )
         if result:
             # Reload the specific sound for this drum part
             self.sound_service.reload_specific_sound(drum_id)
@@ -196,13 +240,14 @@ class DrumMachineService(IPlayer):
 
     def remove_drum_part(self, drum_id: str) -> bool:
         """Remove a drum part from the service"""
-        result = self.sound_service.drum_part_manager.remove_part(drum_id)
+        with self.window.history_service.record_session():
+            result = self.sound_service.drum_part_manager.remove_part(drum_id)
+            if result:
+                # Remove from drum machine state
+                self.pattern.remove_part(drum_id)
         if result:
-            # Remove from drum machine state
-            self.drum_parts_state.pop(drum_id, None)
-            # Rebuild the UI to reflect the removal
-            self.window.drum_grid_builder.rebuild_drum_parts_column()
-            self.window.drum_grid_builder.rebuild_carousel()
+            # Drop the part's row from the UI; the step grids follow by themselves
+            self.window.drum_grid_builder.remove_drum_part_row(drum_id)
             # Update total beats in case pattern changed
             self.update_total_beats()
             logging.info(f"Removed drum part: {drum_id}")
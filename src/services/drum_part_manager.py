@@ -20,7 +20,8 @@
 import logging
 import os
 import uuid
-from typing import List, Optional, Dict
+from dataclasses import replace
+from typing import Callable, List, Optional, Dict, Tuple
 from ..models.drum_part import DrumPart
 from ..config.constants import DEFAULT_DRUM_PARTS
 
@@ -43,6 +44,12 @@ class DrumPartManager:
     def __init__(self, bundled_sounds_dir: str):
         self.bundled_sounds_dir = bundled_sounds_dir
         self._drum_parts: List[DrumPart] = []
+        self._parts_by_id: Dict[str, DrumPart] = {}
+        self._parts_by_midi_note: Dict[int, DrumPart] = {}
+        self._part_indices: Dict[str, int] = {}
+        self._snapshot: Tuple[DrumPart, ...] = ()
+        self._version = 0
+        self._listeners: List[Callable[[int], None]] = []
         self._load_default_parts()
 
     def _load_default_parts(self):
@@ -53,25 +60,52 @@ class DrumPartManager:
                 midi_note_id = DEFAULT_MIDI_NOTES.get(name)
                 drum_part = DrumPart.create_default(name, file_path, midi_note_id)
                 self._drum_parts.append(drum_part)
-
-    def get_all_parts(self) -> List[DrumPart]:
-        return self._drum_parts.copy()
+        self._rebuild_index()
+
+    def _rebuild_index(self):
+        """Refresh the lookup dicts and snapshot after the part list changed"""
+        self._snapshot = tuple(self._drum_parts)
+        self._parts_by_id = {part.id: part for part in self._snapshot}
+        self._part_indices = {part.id: i for i, part in enumerate(self._snapshot)}
+        self._parts_by_midi_note = {}
+        for part in self._snapshot:
+            if part.midi_note_id is not None:
+                self._parts_by_midi_note.setdefault(part.midi_note_id, part)
+        self._version += 1
+        for listener in list(self._listeners):
+            listener(self._version)
+
+    def add_listener(self, listener: Callable[[int], None]) -> None:
+        """Call listener with the new version whenever the part list changes"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[int], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    @property
+    def version(self) -> int:
+        """Counter bumped whenever parts are added, removed, reordered or replaced"""
+        return self._version
+
+    def get_all_parts(self) -> Tuple[DrumPart, ...]:
+        """Get an immutable snapshot of the drum parts in display order
+
+        The same tuple is returned until the next change to the part list,
+        so callers can hold on to it without copying. Parts are never edited
+        in place; an update swaps in a new DrumPart instead.
+        """
+        return self._snapshot
 
     def get_part_by_id(self, part_id: str) -> Optional[DrumPart]:
-        for part in self._drum_parts:
-            if part.id == part_id:
-                return part
-        return None
+        return self._parts_by_id.get(part_id)
 
     def get_parts_dict(self) -> Dict[str, DrumPart]:
-        return {part.id: part for part in self._drum_parts}
+        return dict(self._parts_by_id)
 
     def get_part_by_midi_note(self, midi_note: int) -> Optional[DrumPart]:
         """Get a drum part by its MIDI note ID"""
-        for part in self._drum_parts:
-            if part.midi_note_id == midi_note:
-                return part
-        return None
+        return self._parts_by_midi_note.get(midi_note)
 
     def get_or_create_part_for_midi_note(self, midi_note: int) -> DrumPart:
         """Get an existing drum part for a MIDI note, or create a temporary one
@@ -89,11 +123,13 @@ class DrumPartManager:
             midi_note_id=midi_note,
         )
         self._drum_parts.append(temp_part)
+        self._rebuild_index()
         return temp_part
 
     def add_temporary_part(self, drum_part: DrumPart):
         """Add a temporary drum part (for Note X parts from patterns)"""
         self._drum_parts.append(drum_part)
+        self._rebuild_index()
 
     def add_custom_part(self, name: str, source_file: str) -> Optional[DrumPart]:
         """Add a new custom drum part from an audio file"""
@@ -110,6 +146,7 @@ class DrumPartManager:
         midi_note_id = self._get_next_available_midi_note()
         drum_part = DrumPart.create_custom(name, source_file, midi_note_id)
         self._drum_parts.append(drum_part)
+        self._rebuild_index()
         return drum_part
 
     def remove_part(self, part_id: str) -> bool:
@@ -119,6 +156,7 @@ class DrumPartManager:
             return False
 
         self._drum_parts = [p for p in self._drum_parts if p.id != part_id]
+        self._rebuild_index()
         return True
 
     def reorder_part(self, part_id: str, new_index: int) -> bool:
@@ -139,20 +177,18 @@ class DrumPartManager:
             logging.warning(f"Invalid reorder index: {new_index}")
             return False
 
-        current_index = self._drum_parts.index(part)
+        current_index = self._part_indices[part_id]
         if current_index == new_index:
             return True
 
-        self._drum_parts.remove(part)
+        del self._drum_parts[current_index]
         self._drum_parts.insert(new_index, part)
+        self._rebuild_index()
         return True
 
     def get_part_index(self, part_id: str) -> int:
         """Get the index of a drum part in the list"""
-        for i, part in enumerate(self._drum_parts):
-            if part.id == part_id:
-                return i
-        return -1
+        return self._part_indices.get(part_id, -1)
 
     def replace_part(
         self, part_id: str, source_file: str, new_name: str
@@ -170,9 +206,8 @@ class DrumPartManager:
             logging.error(f"Drum part not found: {part_id}")
             return None
 
-        part.name = new_name
-        part.file_path = source_file
-        part.is_custom = True
+        part = replace(part, name=new_name, file_path=source_file, is_custom=True)
+        self._swap_part(part)
         return part
 
     def update_part_midi_note(self, part_id: str, midi_note: int) -> bool:
@@ -181,9 +216,14 @@ class DrumPartManager:
         if not part:
             return False
 
-        part.midi_note_id = midi_note
+        self._swap_part(replace(part, midi_note_id=midi_note))
         return True
 
+    def _swap_part(self, part: DrumPart) -> None:
+        """Put an updated copy of a part in place of the one with its id"""
+        self._drum_parts[self._part_indices[part.id]] = part
+        self._rebuild_index()
+
     def is_file_available(self, part_id: str) -> bool:
         """Check if a drum part's file is currently available"""
         part = self.get_part_by_id(part_id)
@@ -192,6 +232,11 @@ class DrumPartManager:
 
         return os.path.exists(part.file_path)
 
+    def set_parts(self, parts: List[DrumPart]):
+        """Replace every drum part at once, e.g. when restoring a project"""
+        self._drum_parts = list(parts)
+        self._rebuild_index()
+
     def reset_to_defaults(self):
         """Reset drum parts to defaults, removing all custom samples"""
         self._drum_parts = []
@@ -199,11 +244,7 @@ class DrumPartManager:
 
     def _collect_used_notes(self) -> set:
         """Collect all currently used MIDI notes"""
-        return {
-            part.midi_note_id
-            for part in self._drum_parts
-            if part.midi_note_id is not None
-        }
+        return set(self._parts_by_midi_note)
 
     def _get_next_available_midi_note(self) -> int:
         """
@@ -0,0 +1,450 @@
+# services/export_queue_service.py
+#
+# Copyright 2025 revisto
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import itertools
+import logging
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Callable, Dict, List, Optional
+from gi.repository import GLib
+from ..config.constants import EXPORT_QUEUE_MAX_WORKERS, EXPORT_WORKER_NICENESS
+from ..utils.cancellation import CancellationToken, ExportCancelled
+from ..utils.export_progress import ExportProgressHandler
+
+
+class ExportJobKind(Enum):
+    SINGLE = "single"
+    MULTI = "multi"
+    STEMS = "stems"
+
+
+class ExportJobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    @property
+    def is_finished(self) -> bool:
+        return self in (
+            ExportJobStatus.DONE,
+            ExportJobStatus.FAILED,
+            ExportJobStatus.CANCELLED,
+        )
+
+
+class ExportJob:
+    """A single queued export and its independent status
+
+    The job is also the export_task handed to AudioExportService, so it
+    owns the cancellation token and the encoder processes of its targets.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(
+        self,
+        kind: ExportJobKind,
+        pattern,
+        bpm: float,
+        file_paths: List[str],
+        repeat_count: int = 1,
+        metadata: Optional[dict] = None,
+        include_master: bool = True,
+        progress_callback: Optional[Callable] = None,
+        target_callback: Optional[Callable] = None,
+        status_callback: Optional[Callable] = None,
+    ) -> None:
+        self.job_id = next(self._ids)
+        self.kind = kind
+        # Pin the job to the pattern as it is now; later edits publish new
+        # snapshots and leave this one untouched
+        self.pattern = pattern.publish_snapshot()
+        self.bpm = bpm
+        self.total_beats: Optional[int] = None
+        self.file_paths = list(file_paths)
+        self.repeat_count = repeat_count
+        self.metadata = metadata
+        self.include_master = include_master
+        self.progress_callback = progress_callback
+        self.target_callback = target_callback
+        self.status_callback = status_callback
+
+        self.status = ExportJobStatus.QUEUED
+        self.results: Dict[str, bool] = {}
+        self.cancellation_token = CancellationToken()
+        self.cancelled_targets = set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self.cancellation_token.is_cancelled
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status.is_finished
+
+    def cancel(self) -> None:
+        """Cancel the job whether it is queued or running"""
+        self.cancellation_token.cancel()
+
+    def cancel_target(self, file_path: str) -> None:
+        """Cancel a single target of a multi-target job"""
+        self.cancelled_targets.add(file_path)
+        process = self.cancellation_token.get_process(file_path)
+        if process:
+            CancellationToken.kill_process(process)
+
+    def is_target_cancelled(self, file_path: str) -> bool:
+        return self.is_cancelled or file_path in self.cancelled_targets
+
+    def register_process(self, file_path: str, process: subprocess.Popen) -> None:
+        self.cancellation_token.register_process(file_path, process)
+
+    def unregister_process(self, file_path: str) -> None:
+        self.cancellation_token.unregister_process(file_path)
+
+    def report_progress(self, phase, fraction: float = 0.0) -> None:
+        if self.progress_callback:
+            self.progress_callback(phase, fraction)
+
+    def report_target(self, file_path: str, status) -> None:
+        if self.target_callback:
+            self.target_callback(file_path, status)
+
+    def report_status(self, status: ExportJobStatus) -> bool:
+        """Hand a status change to the status callback; runs on the GTK thread"""
+        if self.status_callback:
+            self.status_callback(self, status)
+        return GLib.SOURCE_REMOVE
+
+
+class ExportQueueService:
+    """Runs export jobs on a bounded pool of low-priority worker threads"""
+
+    def __init__(
+        self, audio_export_service, max_workers: int = EXPORT_QUEUE_MAX_WORKERS
+    ) -> None:
+        self.audio_export_service = audio_export_service
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[int, ExportJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, job: ExportJob) -> ExportJob:
+        """Queue a job; it starts as soon as a worker is free"""
+        if job.total_beats is None:
+            window = self.audio_export_service.window
+            job.total_beats = window.drum_machine_service.total_beats
+
+        with self._lock:
+            self._jobs[job.job_id] = job
+        self._get_executor().submit(self._run_job, job)
+        logging.info(f"Queued export job {job.job_id}: {', '.join(job.file_paths)}")
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued or running job"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if not job:
+            return False
+        job.cancel()
+        return True
+
+    def cancel_all(self) -> None:
+        for job in self.get_jobs():
+            job.cancel()
+
+    def get_jobs(self) -> List[ExportJob]:
+        """Get the jobs that are queued or running"""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def has_active_jobs(self) -> bool:
+        with self._lock:
+            return bool(self._jobs)
+
+    def shutdown(self) -> None:
+        """Cancel every job and stop the worker pool"""
+        self.cancel_all()
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="export-worker",
+                initializer=_lower_worker_priority,
+            )
+        return self._executor
+
+    def _run_job(self, job: ExportJob) -> None:
+        if job.is_cancelled:
+            self._finish_job(job, ExportJobStatus.CANCELLED)
+            return
+
+        self._set_status(job, ExportJobStatus.RUNNING)
+        try:
+            job.results = self._export(job)
+            status = (
+                ExportJobStatus.DONE
+                if job.results and all(job.results.values())
+                else ExportJobStatus.FAILED
+            )
+        except ExportCancelled:
+            status = ExportJobStatus.CANCELLED
+        except Exception as e:
+            logging.error(f"Export job {job.job_id} failed: {e}")
+            status = ExportJobStatus.FAILED
+
+        if job.is_cancelled:
+            status = ExportJobStatus.CANCELLED
+        self._finish_job(job, status)
+
+    def _export(self, job: ExportJob) -> Dict[str, bool]:
+        """Run the export function matching the job kind"""
+        service = self.audio_export_service
+        common = {
+            "progress_callback": job.report_progress,
+            "repeat_count": job.repeat_count,
+            "metadata": job.metadata,
+            "export_task": job,
+            "total_beats": job.total_beats,
+        }
+
+        if job.kind == ExportJobKind.SINGLE:
+            file_path = job.file_paths[0]
+            success = service.export_audio(
+                job.pattern, job.bpm, file_path, **common
+            )
+            return {file_path: success}
+
+        common["target_callback"] = job.report_target
+        if job.kind == ExportJobKind.STEMS:
+            return service.export_stems(
+                job.pattern,
+                job.bpm,
+                job.file_paths[0],
+                include_master=job.include_master,
+                **common,
+            )
+        return service.export_audio_multi(
+            job.pattern, job.bpm, job.file_paths, **common
+        )
+
+    def _finish_job(self, job: ExportJob, status: ExportJobStatus) -> None:
+        with self._lock:
+            self._jobs.pop(job.job_id, None)
+        self._set_status(job, status)
+        logging.info(f"Export job {job.job_id} finished: {status.value}")
+
+    def _set_status(self, job: ExportJob, status: ExportJobStatus) -> None:
+        job.status = status
+        # Pass the status along, the job may have moved on by the time the
+        # callback runs. The callback itself is looked up then, so a dialog
+        # that detached in the meantime is not called.
+        GLib.idle_add(job.report_status, status)
+
+
+class ExportTask:
+    """Submits an export to the export queue and follows its progress
+
+    Exports are not tied to the task: several can be queued at once, and a
+    job keeps running in the background when its dialog goes away.
+    """
+
+    def __init__(self, export_queue_service, progress_handler: ExportProgressHandler):
+        self.export_queue_service = export_queue_service
+        self.progress_handler = progress_handler
+        self.job: Optional[ExportJob] = None
+
+    @property
+    def is_cancelled(self):
+        return self.job is not None and self.job.is_cancelled
+
+    @property
+    def is_running(self):
+        return self.job is not None and not self.job.is_finished
+
+    def start_export(
+        self,
+        pattern,
+        bpm,
+        filename,
+        repeat_count,
+        metadata,
+        completion_callback,
+    ):
+        """Queue the export of the pattern to a single file
+
+        completion_callback receives (success, filename).
+        """
+
+        def on_finished(job):
+            completion_callback(job.results.get(filename, False), filename)
+
+        return self._submit(
+            ExportJobKind.SINGLE,
+            pattern,
+            bpm,
+            [filename],
+            repeat_count,
+            metadata,
+            on_finished,
+        )
+
+    def start_multi_export(
+        self,
+        pattern,
+        bpm,
+        filenames,
+        repeat_count,
+        metadata,
+        completion_callback,
+    ):
+        """Queue a render-once, encode-many export
+
+        completion_callback receives a dict mapping each filename to whether
+        it was written successfully.
+        """
+        return self._submit(
+            ExportJobKind.MULTI,
+            pattern,
+            bpm,
+            filenames,
+            repeat_count,
+            metadata,
+            lambda job: completion_callback(job.results),
+        )
+
+    def start_stem_export(
+        self,
+        pattern,
+        bpm,
+        filename,
+        repeat_count,
+        metadata,
+        completion_callback,
+        include_master=True,
+    ):
+        """Queue a single-pass export of one file per drum part
+
+        completion_callback receives a dict mapping each written filename to
+        whether it was written successfully.
+        """
+        return self._submit(
+            ExportJobKind.STEMS,
+            pattern,
+            bpm,
+            [filename],
+            repeat_count,
+            metadata,
+            lambda job: completion_callback(job.results),
+            include_master=include_master,
+        )
+
+    def cancel_export(self):
+        """Cancel the ongoing export
+
+        Loading, rendering and encoding all watch the cancellation token, and
+        any running ffmpeg process is killed right away.
+        """
+        if self.job:
+            self.job.cancel()
+        self.progress_handler.stop_progress_tracking()
+
+    def cancel_target(self, filename):
+        """Cancel a single target of a multi-target export"""
+        if self.job:
+            self.job.cancel_target(filename)
+
+    def detach(self):
+        """Stop following the job but let it finish in the background"""
+        self.progress_handler.stop_progress_tracking()
+        if self.job:
+            self.job.progress_callback = None
+            self.job.target_callback = None
+            self.job.status_callback = None
+
+    def _submit(
+        self,
+        kind,
+        pattern,
+        bpm,
+        filenames,
+        repeat_count,
+        metadata,
+        on_finished,
+        include_master=True,
+    ):
+        self.progress_handler.start_progress_tracking()
+
+        def on_status(job, status):
+            if not status.is_finished:
+                return
+            self.progress_handler.stop_progress_tracking()
+            if status != ExportJobStatus.CANCELLED:
+                on_finished(job)
+
+        self.job = ExportJob(
+            kind,
+            pattern,
+            bpm,
+            filenames,
+            repeat_count=repeat_count,
+            metadata=metadata,
+            include_master=include_master,
+            progress_callback=self.progress_handler.update_phase,
+            target_callback=self.progress_handler.update_target_status,
+            status_callback=on_status,
+        )
+        self.export_queue_service.submit(self.job)
+        return True
+
+
+def _lower_worker_priority() -> None:
+    """Run the calling export worker at background CPU and I/O priority
+
+    Niceness and I/O class are per-thread on Linux and inherited by the
+    threads and ffmpeg processes the worker starts.
+    """
+    thread_id = threading.get_native_id()
+    try:
+        os.setpriority(os.PRIO_PROCESS, thread_id, EXPORT_WORKER_NICENESS)
+    except (AttributeError, OSError) as e:
+        logging.debug(f"Could not lower export worker CPU priority: {e}")
+
+    ionice = shutil.which("ionice")
+    if not ionice:
+        return
+    try:
+        subprocess.run(
+            [ionice, "-c", "3", "-p", str(thread_id)],
+            check=True,
+            capture_output=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        logging.debug(f"Could not lower export worker I/O priority: {e}")
@@ -19,20 +19,38 @@
 
 import os
 import subprocess
+import threading
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from ..config.constants import EXPORT_MAX_ENCODERS_PER_JOB
 from ..config.export_formats import ExportFormatRegistry
+from ..utils.export_progress import ExportTargetStatus
+from ..utils.cancellation import ExportCancelled
 
 
 class AudioEncoder:
     """Handles encoding audio data to various file formats"""
 
+    # Size of the chunks written to ffmpeg's stdin
+    WRITE_CHUNK_BYTES = 1 << 20
+
     def __init__(self, format_registry: ExportFormatRegistry):
         self.format_registry = format_registry
 
     def encode_to_file(
-        self, audio_data, sample_rate, file_path, metadata=None, export_task=None
+        self,
+        audio_data,
+        sample_rate,
+        file_path,
+        metadata=None,
+        export_task=None,
+        progress_callback=None,
     ):
-        """Encode audio data to the specified file format"""
+        """Encode audio data to the specified file format
+
+        progress_callback, if given, receives the encoded fraction (0.0-1.0)
+        as reported by ffmpeg.
+        """
         file_ext = os.path.splitext(file_path)[1].lower()
         format_info = self.format_registry.get_format_by_extension(file_ext)
 
@@ -41,16 +59,145 @@ class AudioEncoder:
             metadata = None
 
         self._encode_with_ffmpeg(
-            audio_data, sample_rate, file_path, metadata, export_task
+            audio_data, sample_rate, file_path, metadata, export_task, progress_callback
         )
 
-    def _encode_with_ffmpeg(
-        self, audio_data, sample_rate, file_path, metadata=None, export_task=None
+    def encode_to_files(
+        self,
+        audio_data,
+        sample_rate,
+        file_paths,
+        metadata=None,
+        export_task=None,
+        target_callback=None,
+        progress_callback=None,
     ):
-        """Use ffmpeg to encode audio data"""
+        """Encode the same audio data to several files concurrently
+
+        Every target gets its own ffmpeg process, all fed from one shared
+        read-only view of the rendered buffer.
+
+        Returns:
+            Dict mapping each file path to True if it was written successfully
+        """
+        targets = {file_path: audio_data for file_path in file_paths}
+        return self.encode_targets(
+            targets,
+            sample_rate,
+            metadata,
+            export_task,
+            target_callback,
+            progress_callback,
+        )
+
+    def encode_targets(
+        self,
+        targets,
+        sample_rate,
+        metadata=None,
+        export_task=None,
+        target_callback=None,
+        progress_callback=None,
+    ):
+        """Encode each (file path, audio data) target with its own ffmpeg process
+
+        At most EXPORT_MAX_ENCODERS_PER_JOB targets are encoded at once.
+
+        progress_callback, if given, receives the mean encoded fraction of
+        all targets.
+
+        Returns:
+            Dict mapping each file path to True if it was written successfully
+        """
+        fractions = {file_path: 0.0 for file_path in targets}
+
+        def make_target_progress(file_path):
+            if not progress_callback:
+                return None
+
+            def on_target_progress(fraction):
+                fractions[file_path] = fraction
+                progress_callback(sum(fractions.values()) / len(fractions))
+
+            return on_target_progress
+
+        # Remaining targets wait for a free encoder so an export with many
+        # stems does not start one ffmpeg process each
+        max_encoders = min(
+            len(targets), EXPORT_MAX_ENCODERS_PER_JOB, os.cpu_count() or 2
+        )
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_encoders)) as executor:
+            futures = {
+                file_path: executor.submit(
+                    self._encode_target,
+                    audio_data,
+                    sample_rate,
+                    file_path,
+                    metadata,
+                    export_task,
+                    target_callback,
+                    make_target_progress(file_path),
+                )
+                for file_path, audio_data in targets.items()
+            }
+            for file_path, future in futures.items():
+                results[file_path] = future.result()
+        return results
+
+    def _encode_target(
+        self,
+        audio_data,
+        sample_rate,
+        file_path,
+        metadata,
+        export_task,
+        callback,
+        progress_callback,
+    ):
+        """Encode a single target of a multi-target export"""
+        if export_task and export_task.is_target_cancelled(file_path):
+            self._notify_target(callback, file_path, ExportTargetStatus.CANCELLED)
+            return False
+
+        self._notify_target(callback, file_path, ExportTargetStatus.ENCODING)
+        try:
+            self.encode_to_file(
+                audio_data,
+                sample_rate,
+                file_path,
+                metadata,
+                export_task,
+                progress_callback,
+            )
+        except Exception as e:
+            if export_task and export_task.is_target_cancelled(file_path):
+                self._notify_target(callback, file_path, ExportTargetStatus.CANCELLED)
+            else:
+                logging.error(f"Encoding failed for {file_path}: {e}")
+                self._notify_target(callback, file_path, ExportTargetStatus.FAILED)
+            return False
+
+        if export_task and export_task.is_target_cancelled(file_path):
+            self._notify_target(callback, file_path, ExportTargetStatus.CANCELLED)
+            return False
+
+        self._notify_target(callback, file_path, ExportTargetStatus.DONE)
+        return True
+
+    def _notify_target(self, callback, file_path, status):
+        """Report a target status change if a callback was given"""
+        if callback:
+            callback(file_path, status)
+
+    def _build_ffmpeg_command(self, sample_rate, file_path, metadata):
+        """Build the ffmpeg command line for encoding raw audio from stdin"""
         cmd = [
             "ffmpeg",
             "-y",  # Overwrite output files
+            "-nostats",
+            "-progress",
+            "pipe:1",  # Machine-readable progress on stdout
             "-f",
             "f32le",  # Input format: 32-bit float little endian
             "-ar",
@@ -77,6 +224,19 @@ class AudioEncoder:
         self._add_metadata_to_command(cmd, metadata)
 
         cmd.append(file_path)
+        return cmd
+
+    def _encode_with_ffmpeg(
+        self,
+        audio_data,
+        sample_rate,
+        file_path,
+        metadata=None,
+        export_task=None,
+        progress_callback=None,
+    ):
+        """Use ffmpeg to encode audio data"""
+        cmd = self._build_ffmpeg_command(sample_rate, file_path, metadata)
 
         # Start the subprocess and store reference in export_task
         process = subprocess.Popen(
@@ -84,27 +244,91 @@ class AudioEncoder:
         )
 
         if export_task:
-            export_task.current_process = process
+            export_task.register_process(file_path, process)
 
         # Check for cancellation before starting
-        if export_task and export_task.is_cancelled:
+        if export_task and export_task.is_target_cancelled(file_path):
             process.terminate()
+            export_task.unregister_process(file_path)
             return
 
         try:
-            stdout, stderr = process.communicate(input=audio_data.tobytes())
+            duration_us = len(audio_data) / sample_rate * 1_000_000
+            stderr = self._run_encoder(
+                process, audio_data, duration_us, progress_callback
+            )
+            if export_task and export_task.is_target_cancelled(file_path):
+                raise ExportCancelled()
             if process.returncode != 0:
                 error_msg = stderr.decode() if stderr else "Unknown error"
                 logging.error(f"FFmpeg encoding failed: {error_msg}")
                 raise subprocess.CalledProcessError(
-                    process.returncode, cmd, stdout, stderr
+                    process.returncode, cmd, None, stderr
                 )
         except subprocess.CalledProcessError as e:
             logging.error(f"Audio encoding failed for {file_path}: {e}")
             raise
         finally:
             if export_task:
-                export_task.current_process = None
+                export_task.unregister_process(file_path)
+
+    def _run_encoder(self, process, audio_data, duration_us, progress_callback):
+        """Feed audio to ffmpeg while parsing its progress output
+
+        Returns:
+            Everything ffmpeg wrote to stderr
+        """
+        stderr_chunks = []
+        stderr_reader = threading.Thread(
+            target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True
+        )
+        # Hand ffmpeg a byte view of the buffer so that concurrent encodes
+        # of the same render share it instead of copying it per target
+        stdin_writer = threading.Thread(
+            target=self._write_audio,
+            args=(process.stdin, memoryview(audio_data).cast("B")),
+            daemon=True,
+        )
+        stderr_reader.start()
+        stdin_writer.start()
+
+        for line in process.stdout:
+            if progress_callback and duration_us > 0:
+                encoded_us = self._parse_progress_line(line)
+                if encoded_us is not None:
+                    progress_callback(min(1.0, max(0.0, encoded_us / duration_us)))
+
+        process.wait()
+        stdin_writer.join()
+        stderr_reader.join()
+        return b"".join(stderr_chunks)
+
+    def _parse_progress_line(self, line):
+        """Get the encoded time in microseconds from a -progress output line"""
+        key, separator, value = line.decode(errors="replace").strip().partition("=")
+        # Older ffmpeg releases report microseconds under the out_time_ms key
+        if not separator or key not in ("out_time_us", "out_time_ms"):
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            return None
+
+    def _write_audio(self, stdin, audio_bytes):
+        """Write the audio bytes to ffmpeg's stdin in chunks"""
+        try:
+            for start in range(0, len(audio_bytes), self.WRITE_CHUNK_BYTES):
+                end = start + self.WRITE_CHUNK_BYTES
+                stdin.write(audio_bytes[start:end])
+        except (BrokenPipeError, ValueError, OSError):
+            # ffmpeg exited early (error or cancellation); its exit code is
+            # reported by the caller
+            pass
+        finally:
+            try:
+                stdin.close()
+            except OSError:
+                pass
 
     def _has_valid_cover_art(self, metadata):
         """Check if metadata contains valid cover art"""
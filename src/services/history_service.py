@@ -0,0 +1,354 @@
+# services/history_service.py
+#
+# Copyright 2025 revisto
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import time
+import logging
+import numpy as np
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple, Union
+from ..config.constants import HISTORY_MAX_BYTES, HISTORY_COALESCE_SECONDS
+from ..models.drum_part import DrumPart
+from ..models.pattern import Pattern, PatternChange, PatternChangeKind, PatternView
+from ..utils.project_file import ProjectData
+
+# Rough memory estimates used to keep the history under HISTORY_MAX_BYTES
+ENTRY_BYTES = 128
+CELL_BYTES = 72
+PART_BYTES = 512
+
+
+@dataclass
+class StepEdit:
+    """Steps that were all set to the same state, e.g. by one paint stroke
+
+    Cells are the keys of a dict, which keeps them in paint order and makes
+    checking a stroke for an already painted cell O(1).
+    """
+
+    active: bool
+    cells: Dict[Tuple[str, int], None] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return ENTRY_BYTES + len(self.cells) * CELL_BYTES
+
+
+@dataclass
+class BpmEdit:
+    before: float
+    after: float
+    timestamp: float = 0.0
+
+    @property
+    def size(self) -> int:
+        return ENTRY_BYTES
+
+
+@dataclass
+class SessionState:
+    """Parts, pattern and BPM captured around a bulk edit"""
+
+    parts: Tuple[DrumPart, ...]
+    pattern: PatternView
+    bpm: float
+
+    @property
+    def steps(self) -> int:
+        return max(self.pattern.last_active_step() + 1, 1)
+
+
+@dataclass
+class SessionEdit:
+    """A bulk edit stored as a bitset diff of the pattern
+
+    The matrices before and after the edit are aligned on the union of their
+    rows and XORed, so either side can be rebuilt from the other. Parts are
+    only kept when the edit changed them.
+    """
+
+    before_rows: Tuple[str, ...]
+    after_rows: Tuple[str, ...]
+    steps: int
+    diff: np.ndarray
+    before_bpm: float
+    after_bpm: float
+    before_parts: Optional[Tuple[DrumPart, ...]] = None
+    after_parts: Optional[Tuple[DrumPart, ...]] = None
+
+    @classmethod
+    def from_states(cls, before: SessionState, after: SessionState) -> "SessionEdit":
+        before_rows = tuple(before.pattern.part_ids)
+        after_rows = tuple(after.pattern.part_ids)
+        rows = _union_rows(before_rows, after_rows)
+        steps = max(before.steps, after.steps)
+        diff = _align(before.pattern, rows, steps) ^ _align(after.pattern, rows, steps)
+        parts_changed = before.parts != after.parts
+        return cls(
+            before_rows=before_rows,
+            after_rows=after_rows,
+            steps=steps,
+            diff=np.packbits(diff, axis=1),
+            before_bpm=before.bpm,
+            after_bpm=after.bpm,
+            before_parts=before.parts if parts_changed else None,
+            after_parts=after.parts if parts_changed else None,
+        )
+
+    @property
+    def size(self) -> int:
+        part_count = len(self.before_parts or ()) + len(self.after_parts or ())
+        return ENTRY_BYTES + self.diff.nbytes + part_count * PART_BYTES
+
+    def is_empty(self) -> bool:
+        return (
+            self.before_rows == self.after_rows
+            and self.before_bpm == self.after_bpm
+            and self.before_parts is None
+            and not self.diff.any()
+        )
+
+    def rebuild_pattern(self, current: PatternView, undo: bool) -> Pattern:
+        """Rebuild the pattern on the other side of this edit"""
+        rows = _union_rows(self.before_rows, self.after_rows)
+        changed = np.unpackbits(self.diff, axis=1, count=self.steps).astype(np.bool_)
+        matrix = _align(current, rows, self.steps) ^ changed
+        target_rows = self.before_rows if undo else self.after_rows
+        row_indices = {part_id: row for row, part_id in enumerate(rows)}
+        return Pattern.from_matrix(
+            target_rows, matrix[[row_indices[part_id] for part_id in target_rows]]
+        )
+
+
+HistoryEntry = Union[StepEdit, BpmEdit, SessionEdit]
+
+
+def _union_rows(
+    before_rows: Tuple[str, ...], after_rows: Tuple[str, ...]
+) -> Tuple[str, ...]:
+    added = tuple(part_id for part_id in after_rows if part_id not in before_rows)
+    return before_rows + added
+
+
+def _align(pattern: PatternView, rows: Tuple[str, ...], steps: int) -> np.ndarray:
+    """Copy a pattern's matrix into the given row order and width"""
+    aligned = np.zeros((len(rows), steps), dtype=np.bool_)
+    pattern_rows = {part_id: row for row, part_id in enumerate(pattern.part_ids)}
+    columns = min(steps, pattern.step_capacity)
+    matrix = pattern.matrix
+    for row, part_id in enumerate(rows):
+        if part_id in pattern_rows:
+            aligned[row, :columns] = matrix[pattern_rows[part_id], :columns]
+    return aligned
+
+
+class HistoryService:
+    """Undo and redo stacks of inverse operations
+
+    Toggles are recorded from the pattern's change events and undone by
+    flipping the same steps back. Bulk edits are wrapped in record_session()
+    and stored as a bitset diff, never as a copy of the whole pattern.
+    """
+
+    def __init__(self, window, max_bytes: int = HISTORY_MAX_BYTES) -> None:
+        self.window = window
+        self.max_bytes = max_bytes
+        self._undo_stack: Deque[HistoryEntry] = deque()
+        self._redo_stack: List[HistoryEntry] = []
+        self._size = 0
+        self._suspended = 0
+        self._coalescing = False
+        self._in_stroke = False
+        self._listeners: List[Callable[[], None]] = []
+        self.window.drum_machine_service.pattern.add_listener(self._on_pattern_changed)
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """Call listener whenever undo or redo availability may have changed"""
+        self._listeners.append(listener)
+
+    def can_undo(self) -> bool:
+        return bool(self._undo_stack)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo_stack)
+
+    def clear(self) -> None:
+        self._undo_stack.clear()
+        self._redo_stack.clear()
+        self._size = 0
+        self._coalescing = False
+        self._notify()
+
+    def undo(self) -> None:
+        if not self._undo_stack:
+            return
+        entry = self._undo_stack.pop()
+        self._apply(entry, undo=True)
+        self._redo_stack.append(entry)
+        self._notify()
+
+    def redo(self) -> None:
+        if not self._redo_stack:
+            return
+        entry = self._redo_stack.pop()
+        self._apply(entry, undo=False)
+        self._undo_stack.append(entry)
+        self._notify()
+
+    def begin_stroke(self) -> None:
+        """Start a paint stroke; its step edits coalesce however slow it is"""
+        self._coalescing = False
+        self._in_stroke = True
+
+    def end_stroke(self) -> None:
+        self._in_stroke = False
+        self._coalescing = False
+
+    def record_bpm(self, before: float, after: float) -> None:
+        if self._suspended or before == after:
+            return
+        now = time.monotonic()
+        last = self._undo_stack[-1] if self._undo_stack else None
+        if (
+            self._coalescing
+            and isinstance(last, BpmEdit)
+            and now - last.timestamp <= HISTORY_COALESCE_SECONDS
+        ):
+            last.after = after
+            last.timestamp = now
+            return
+        self._push(BpmEdit(before, after, now))
+
+    @contextmanager
+    def record_session(self) -> Iterator[None]:
+        """Record everything done inside the block as one undoable edit"""
+        if self._suspended:
+            yield
+            return
+
+        before = self._capture()
+        self._suspended += 1
+        try:
+            yield
+        finally:
+            self._suspended -= 1
+
+        edit = SessionEdit.from_states(before, self._capture())
+        if not edit.is_empty():
+            self._push(edit)
+
+    def _on_pattern_changed(self, change: PatternChange) -> None:
+        if self._suspended:
+            return
+        if change.kind not in (
+            PatternChangeKind.STEP_SET,
+            PatternChangeKind.STEP_CLEARED,
+        ):
+            return
+
+        active = change.kind == PatternChangeKind.STEP_SET
+        cell = (change.part_id, change.step)
+        last = self._undo_stack[-1] if self._undo_stack else None
+        # Only a paint stroke merges toggles; separate clicks undo one by one
+        if (
+            self._in_stroke
+            and self._coalescing
+            and isinstance(last, StepEdit)
+            and last.active == active
+            and cell not in last.cells
+        ):
+            last.cells[cell] = None
+            self._size += CELL_BYTES
+            self._trim()
+            return
+        self._push(StepEdit(active, {cell: None}))
+
+    def _capture(self) -> SessionState:
+        drum_machine_service = self.window.drum_machine_service
+        parts = self.window.sound_service.drum_part_manager.get_all_parts()
+        return SessionState(
+            parts=parts,
+            pattern=drum_machine_service.pattern.publish_snapshot(),
+            bpm=drum_machine_service.bpm,
+        )
+
+    def _push(self, entry: HistoryEntry) -> None:
+        self._undo_stack.append(entry)
+        self._size += entry.size
+        for dropped in self._redo_stack:
+            self._size -= dropped.size
+        self._redo_stack.clear()
+        self._coalescing = not isinstance(entry, SessionEdit)
+        self._trim()
+        self._notify()
+
+    def _trim(self) -> None:
+        """Drop the oldest undo entries until the history fits in max_bytes"""
+        while self._size > self.max_bytes and len(self._undo_stack) > 1:
+            self._size -= self._undo_stack.popleft().size
+
+    def _apply(self, entry: HistoryEntry, undo: bool) -> None:
+        self._coalescing = False
+        self._suspended += 1
+        try:
+            with self.window.drum_grid_builder.batch_update():
+                self._apply_entry(entry, undo)
+        except Exception as e:
+            logging.error(f"Failed to apply history entry: {e}")
+        finally:
+            self._suspended -= 1
+        self.window.save_changes_service.mark_unsaved_changes(True)
+
+    def _apply_entry(self, entry: HistoryEntry, undo: bool) -> None:
+        if isinstance(entry, StepEdit):
+            self._apply_step_edit(entry, undo)
+        elif isinstance(entry, BpmEdit):
+            bpm = entry.before if undo else entry.after
+            self.window.bpm_spin_button.set_value(bpm)
+        else:
+            self._apply_session_edit(entry, undo)
+
+    def _apply_step_edit(self, edit: StepEdit, undo: bool) -> None:
+        active = edit.active != undo
+        pattern = self.window.drum_machine_service.pattern
+        for part_id, step in edit.cells:
+            pattern.set_step(part_id, step, active)
+
+        self.window.drum_grid_builder.reset_carousel_pages()
+
+    def _apply_session_edit(self, edit: SessionEdit, undo: bool) -> None:
+        drum_machine_service = self.window.drum_machine_service
+        pattern = edit.rebuild_pattern(
+            drum_machine_service.pattern.publish_snapshot(), undo
+        )
+        bpm = edit.before_bpm if undo else edit.after_bpm
+        parts = edit.before_parts if undo else edit.after_parts
+
+        if parts is None:
+            drum_machine_service.pattern.apply_diff(pattern)
+            drum_machine_service.set_bpm(bpm)
+            self.window.ui_helper.set_bpm_in_ui(bpm)
+        else:
+            drum_machine_service.restore_project(ProjectData(bpm, parts, pattern))
+        self.window.refresh_pattern_view()
+
+    def _notify(self) -> None:
+        for listener in list(self._listeners):
+            listener()
@@ -0,0 +1,244 @@
+# services/pattern_library_service.py
+#
+# Copyright 2025 revisto
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import os
+import json
+import logging
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional
+from gi.repository import GLib
+from ..config.constants import (
+    DEFAULT_BPM,
+    DEFAULT_PATTERNS,
+    USER_DATA_DIR_NAME,
+    PATTERN_INDEX_FILENAME,
+    PATTERN_INDEX_VERSION,
+)
+from ..utils.midi_file import read_note_hits
+
+PATTERN_EXTENSION = ".mid"
+
+
+@dataclass
+class PatternLibraryEntry:
+    """Cached summary and pre-parsed hits of one pattern file"""
+
+    name: str
+    file_path: str
+    is_bundled: bool
+    mtime_ns: int
+    size: int
+    bpm: float
+    length: int
+    notes: List[int] = field(default_factory=list)
+    # MIDI note → sorted 16th-note steps
+    hits: Dict[int, List[int]] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        data["hits"] = {int(note): steps for note, steps in data["hits"].items()}
+        return cls(**data)
+
+
+class PatternLibraryService:
+    """Indexes the bundled and user pattern folders
+
+    Each pattern is parsed once; the result is cached on disk and reused
+    until the file's modification time or size changes.
+    """
+
+    def __init__(
+        self,
+        bundled_dir: str,
+        user_dir: Optional[str] = None,
+        index_path: Optional[str] = None,
+    ) -> None:
+        self.bundled_dir = bundled_dir
+        self.user_dir = user_dir or os.path.join(
+            GLib.get_user_data_dir(), USER_DATA_DIR_NAME, "patterns"
+        )
+        self.index_path = index_path or os.path.join(
+            GLib.get_user_cache_dir(), USER_DATA_DIR_NAME, PATTERN_INDEX_FILENAME
+        )
+        self._entries: Dict[str, PatternLibraryEntry] = {}
+        self._load_index()
+
+    def refresh_async(self, on_refreshed: Callable[[], None]) -> None:
+        """Rescan both folders on a worker thread, parsing only new or
+        modified files, then call on_refreshed on the main loop
+
+        Until then the entries of the cached index stay available.
+        """
+        thread = threading.Thread(
+            target=self._refresh_in_background, args=(on_refreshed,), daemon=True
+        )
+        thread.start()
+
+    def _refresh_in_background(self, on_refreshed: Callable[[], None]) -> None:
+        entries = self._scan_entries()
+        GLib.idle_add(self._finish_refresh, entries, on_refreshed)
+
+    def _finish_refresh(
+        self,
+        entries: Dict[str, PatternLibraryEntry],
+        on_refreshed: Callable[[], None],
+    ) -> bool:
+        self._apply_entries(entries)
+        on_refreshed()
+        return GLib.SOURCE_REMOVE
+
+    def _scan_entries(self) -> Dict[str, PatternLibraryEntry]:
+        entries = {}
+        for directory, is_bundled in (
+            (self.bundled_dir, True),
+            (self.user_dir, False),
+        ):
+            for file_path, stat in self._scan_directory(directory):
+                entry = self._entries.get(file_path)
+                if not self._is_current(entry, stat):
+                    entry = self._parse_entry(file_path, stat, is_bundled)
+                if entry:
+                    entries[file_path] = entry
+        return entries
+
+    def _apply_entries(self, entries: Dict[str, PatternLibraryEntry]) -> None:
+        changed = entries.keys() != self._entries.keys() or any(
+            entries[path] is not self._entries[path] for path in entries
+        )
+        self._entries = entries
+        if changed:
+            self._save_index()
+
+    def get_bundled_entries(self) -> List[PatternLibraryEntry]:
+        """Bundled patterns, in the order of DEFAULT_PATTERNS"""
+        entries = [entry for entry in self._entries.values() if entry.is_bundled]
+        order = {name: index for index, name in enumerate(DEFAULT_PATTERNS)}
+        return sorted(
+            entries, key=lambda entry: (order.get(entry.name, len(order)), entry.name)
+        )
+
+    def get_user_entries(self) -> List[PatternLibraryEntry]:
+        """User patterns, sorted by name"""
+        entries = [entry for entry in self._entries.values() if not entry.is_bundled]
+        return sorted(entries, key=lambda entry: entry.name.casefold())
+
+    def get_entry(self, file_path: str) -> Optional[PatternLibraryEntry]:
+        """Get the entry for a file, re-parsing it if it changed on disk"""
+        entry = self._entries.get(file_path)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        if not self._is_current(entry, stat):
+            entry = self._parse_entry(file_path, stat, entry.is_bundled)
+            if entry is None:
+                return None
+            self._entries[file_path] = entry
+            self._save_index()
+        return entry
+
+    def ensure_user_dir(self) -> str:
+        """Create the user pattern folder if needed and return its path"""
+        try:
+            os.makedirs(self.user_dir, exist_ok=True)
+        except OSError as e:
+            logging.warning(f"Failed to create pattern folder {self.user_dir}: {e}")
+        return self.user_dir
+
+    def is_user_pattern_path(self, file_path: str) -> bool:
+        """Check whether a file lives in the user pattern folder"""
+        directory = os.path.dirname(os.path.abspath(file_path))
+        return directory == os.path.abspath(self.user_dir)
+
+    def _is_current(self, entry: Optional[PatternLibraryEntry], stat) -> bool:
+        return (
+            entry is not None
+            and entry.mtime_ns == stat.st_mtime_ns
+            and entry.size == stat.st_size
+        )
+
+    def _scan_directory(self, directory: str):
+        """Yield (path, stat) for every pattern file in a folder"""
+        try:
+            with os.scandir(directory) as scanner:
+                for dir_entry in scanner:
+                    name = dir_entry.name.lower()
+                    if name.endswith(PATTERN_EXTENSION) and dir_entry.is_file():
+                        yield os.path.abspath(dir_entry.path), dir_entry.stat()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logging.warning(f"Failed to scan pattern folder {directory}: {e}")
+
+    def _parse_entry(
+        self, file_path: str, stat, is_bundled: bool
+    ) -> Optional[PatternLibraryEntry]:
+        try:
+            midi_hits = read_note_hits(file_path)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Skipping unreadable pattern {file_path}: {e}")
+            return None
+
+        note_steps = midi_hits.get_note_steps()
+        last_steps = [int(steps.max()) for steps in note_steps.values()]
+        return PatternLibraryEntry(
+            name=os.path.splitext(os.path.basename(file_path))[0],
+            file_path=file_path,
+            is_bundled=is_bundled,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            bpm=midi_hits.bpm or DEFAULT_BPM,
+            length=max(last_steps, default=-1) + 1,
+            notes=list(note_steps),
+            hits={note: steps.tolist() for note, steps in note_steps.items()},
+        )
+
+    def _load_index(self) -> None:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as index_file:
+                index = json.load(index_file)
+            if index.get("version") != PATTERN_INDEX_VERSION:
+                return
+            self._entries = {
+                path: PatternLibraryEntry.from_dict(data)
+                for path, data in index["entries"].items()
+            }
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning(f"Ignoring unreadable pattern index: {e}")
+            self._entries = {}
+
+    def _save_index(self) -> None:
+        index = {
+            "version": PATTERN_INDEX_VERSION,
+            "entries": {path: asdict(entry) for path, entry in self._entries.items()},
+        }
+        temp_path = f"{self.index_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as index_file:
+                json.dump(index, index_file, separators=(",", ":"))
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            logging.warning(f"Failed to write pattern index: {e}")
@@ -17,11 +17,18 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-import mido
-import itertools
 import logging
-from typing import Dict, Tuple
+import numpy as np
+from typing import Dict, Iterable, List, Tuple
 from ..config.constants import DEFAULT_BPM
+from ..models.pattern import Pattern, PatternView
+from ..utils.midi_file import (
+    DEFAULT_TICKS_PER_BEAT,
+    bpm_to_tempo,
+    encode_note_track,
+    read_note_hits,
+    write_midi_file,
+)
 
 
 class PatternService:
@@ -41,107 +48,58 @@ class PatternService:
         drum_part = manager.get_or_create_part_for_midi_note(note)
         return drum_part.id
 
-    def save_pattern(
-        self, file_path: str, drum_parts: Dict[str, Dict[int, bool]], bpm: float
+    def _get_note_hits(self, pattern: PatternView) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the steps and MIDI notes of every hit that has a note"""
+        row_notes = np.array(
+            [self._get_midi_note_for_part(part_id) for part_id in pattern.part_ids],
+            dtype=np.int64,
+        )
+        rows, steps = pattern.get_hits()
+        notes = row_notes[rows]
+        has_note = notes != 0
+        return steps[has_note], notes[has_note]
+
+    def save_pattern(self, file_path: str, pattern: PatternView, bpm: float) -> None:
+        self.save_patterns(file_path, [pattern], bpm)
+
+    def save_patterns(
+        self, file_path: str, patterns: List[PatternView], bpm: float
     ) -> None:
-        try:
-            mid = mido.MidiFile()
-            track = mido.MidiTrack()
-            mid.tracks.append(track)
-
-            track.append(mido.MetaMessage("set_tempo", tempo=mido.bpm2tempo(bpm)))
-
-            # 1. Collect all active notes from all pages into a list
-            events = []
-            for part, notes in drum_parts.items():
-                for beat_index, is_active in notes.items():
-                    if is_active:
-                        note = self._get_midi_note_for_part(part)
-                        if note != 0:
-                            # Store the note and its absolute beat index
-                            events.append({"note": note, "beat": beat_index})
-
-            # 2. Sort events by beat to process them in chronological order
-            events.sort(key=lambda e: e["beat"])
-
-            ticks_per_beat = mid.ticks_per_beat
-            last_time_in_ticks = 0
-            note_duration_ticks = ticks_per_beat // 4  # 16th note duration
-
-            # 3. Group events by beat to handle chords correctly
-            for beat, group in itertools.groupby(events, key=lambda e: e["beat"]):
-                notes_in_chord = [event["note"] for event in group]
-
-                # Calculate time for this beat/chord
-                absolute_time_in_ticks = int(beat * ticks_per_beat / 4)
-                delta_time = absolute_time_in_ticks - last_time_in_ticks
-
-                # Add all note_on messages for the chord
-                # The first note carries the delta_time, subsequent notes have time=0
-                is_first_note = True
-                for note in notes_in_chord:
-                    d_time = delta_time if is_first_note else 0
-                    track.append(
-                        mido.Message("note_on", note=note, velocity=100, time=d_time)
-                    )
-                    is_first_note = False
-
-                # Add all note_off messages for the chord
-                # The first note_off has the duration, subsequent ones have time=0
-                is_first_note = True
-                for note in notes_in_chord:
-                    d_time = note_duration_ticks if is_first_note else 0
-                    track.append(
-                        mido.Message("note_off", note=note, velocity=0, time=d_time)
-                    )
-                    is_first_note = False
+        """Save one or more patterns as consecutive tracks of one MIDI file
 
-                # Update the time of the last event
-                last_time_in_ticks = absolute_time_in_ticks + note_duration_ticks
-
-            mid.save(file_path)
+        The tempo is stored in the first track.
+        """
+        try:
+            tracks = []
+            for index, pattern in enumerate(patterns):
+                steps, notes = self._get_note_hits(pattern)
+                tempo = bpm_to_tempo(bpm) if index == 0 else None
+                tracks.append(
+                    encode_note_track(steps, notes, DEFAULT_TICKS_PER_BEAT, tempo)
+                )
+            write_midi_file(file_path, tracks, DEFAULT_TICKS_PER_BEAT)
             logging.info(f"Pattern saved successfully to {file_path}")
         except Exception as e:
             logging.error(f"Failed to save pattern to {file_path}: {e}")
             raise
 
-    def load_pattern(self, file_path: str) -> Tuple[Dict[str, Dict[int, bool]], float]:
+    def load_pattern(self, file_path: str) -> Tuple[Pattern, float]:
         try:
-            mid = mido.MidiFile(file_path)
-            drum_parts_state = (
-                self.window.drum_machine_service.create_empty_drum_parts_state()
-            )
-            bpm = DEFAULT_BPM
-
-            ticks_per_beat = mid.ticks_per_beat
-            if ticks_per_beat is None:
-                ticks_per_beat = 480  # A common default
-
-            for track in mid.tracks:
-                absolute_time_in_ticks = 0
-                for msg in track:
-                    # Keep a running total of the absolute time
-                    # by adding the delta times
-                    absolute_time_in_ticks += msg.time
-                    if msg.type == "set_tempo":
-                        bpm = mido.tempo2bpm(msg.tempo)
-                    elif msg.type == "note_on" and msg.velocity > 0:
-                        part_id = self._get_part_id_for_midi_note(msg.note)
-
-                        # Initialize part in state if not already present
-                        if part_id not in drum_parts_state:
-                            drum_parts_state[part_id] = {}
-
-                        # Convert absolute time in ticks back to a beat index
-                        # assuming 16th notes
-                        ticks_per_16th_note = ticks_per_beat / 4.0
-                        beat_index = int(
-                            round(absolute_time_in_ticks / ticks_per_16th_note)
-                        )
-                        drum_parts_state[part_id][beat_index] = True
-
+            hits = read_note_hits(file_path)
+            pattern = self.build_pattern(hits.get_note_steps())
             logging.info(f"Pattern loaded successfully from {file_path}")
-            return drum_parts_state, bpm
+            return pattern, hits.bpm or DEFAULT_BPM
         except Exception as e:
             logging.error(f"Failed to load pattern from {file_path}: {e}")
             raise
+
+    def build_pattern(self, note_steps: Dict[int, Iterable[int]]) -> Pattern:
+        """Build a pattern from MIDI note → steps
+
+        Each distinct note is resolved to a drum part once, creating
+        temporary parts for unknown notes in the given order.
+        """
+        pattern = self.window.drum_machine_service.create_empty_pattern()
+        for note, steps in note_steps.items():
+            pattern.set_steps(self._get_part_id_for_midi_note(note), steps)
+        return pattern
@@ -19,24 +19,78 @@
 
 import pygame
 import logging
-from typing import Dict
+import threading
+from typing import Callable, Dict, Iterable, Optional
+from gi.repository import GLib
 from ..interfaces.sound import ISoundService
+from ..models.drum_part import DrumPart
 from .drum_part_manager import DrumPartManager
 from ..config.constants import MIXER_CHANNELS
 
 
 class SoundService(ISoundService):
     def __init__(self, bundled_sounds_dir: str) -> None:
-        pygame.init()
+        # Only the mixer is used; pygame.init() would also start the display,
+        # joystick and other subsystems
+        pygame.mixer.init()
         pygame.mixer.set_num_channels(MIXER_CHANNELS)
         self.bundled_sounds_dir = bundled_sounds_dir
         self.drum_part_manager = DrumPartManager(bundled_sounds_dir)
         self.sounds: Dict[str, pygame.mixer.Sound] = {}
         self._current_volume: float = 1.0
+        # Bumped by every load, so a stale background load is discarded
+        self._load_generation = 0
+        # Waiting for the samples of a background load, see load_sounds_async
+        self._on_loaded: Optional[Callable[[], None]] = None
 
     def load_sounds(self) -> None:
-        self.sounds = {}
-        for part in self.drum_part_manager.get_all_parts():
+        self._load_generation += 1
+        self.sounds = self._decode_sounds(self.drum_part_manager.get_all_parts())
+        self._notify_loaded()
+
+    def load_sounds_async(self, on_loaded: Optional[Callable[[], None]] = None) -> None:
+        """Decode the samples on a worker thread
+
+        The sounds are swapped in on the main loop once decoding finishes,
+        unless another load started in the meantime. on_loaded is called
+        once, when the first load since this call has swapped its sounds in;
+        a load without one keeps waiting for an earlier callback.
+        """
+        self._load_generation += 1
+        if on_loaded:
+            self._on_loaded = on_loaded
+        thread = threading.Thread(
+            target=self._load_in_background,
+            args=(self.drum_part_manager.get_all_parts(), self._load_generation),
+            daemon=True,
+        )
+        thread.start()
+
+    def _load_in_background(self, parts: Iterable[DrumPart], generation: int) -> None:
+        sounds = self._decode_sounds(parts)
+        GLib.idle_add(self._finish_background_load, sounds, generation)
+
+    def _finish_background_load(
+        self, sounds: Dict[str, pygame.mixer.Sound], generation: int
+    ) -> bool:
+        if generation == self._load_generation:
+            # The volume may have changed while the samples were decoding
+            for sound in sounds.values():
+                sound.set_volume(self._current_volume)
+            self.sounds = sounds
+            self._notify_loaded()
+        return GLib.SOURCE_REMOVE
+
+    def _notify_loaded(self) -> None:
+        on_loaded, self._on_loaded = self._on_loaded, None
+        if on_loaded:
+            on_loaded()
+
+    def _decode_sounds(
+        self, parts: Iterable[DrumPart]
+    ) -> Dict[str, pygame.mixer.Sound]:
+        sounds = {}
+        for part in parts:
             try:
                 # Skip temporary parts without file paths
                 if not part.file_path:
@@ -44,9 +98,10 @@ class SoundService(ISoundService):
 
                 sound = pygame.mixer.Sound(part.file_path)
                 sound.set_volume(self._current_volume)
-                self.sounds[part.id] = sound
+                sounds[part.id] = sound
             except Exception as e:
                 logging.error(f"Error loading sound {part.name}: {e}")
+        return sounds
 
     def reload_sounds(self) -> None:
         """Reload all sounds from the current drum parts"""
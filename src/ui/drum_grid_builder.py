@@ -19,13 +19,16 @@
 
 import gi
 import logging
+from contextlib import ExitStack, contextmanager
 
 gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
 from gi.repository import Gtk, Gdk, Adw, GLib
 from gettext import gettext as _
-from ..config.constants import GROUP_TOGGLE_COUNT
+from ..config.constants import CAROUSEL_PAGE_POOL_SIZE
 from ..dialogs.midi_mapping_dialog import MidiMappingDialog
+from ..models.pattern import PatternChange, PatternChangeKind
+from .step_grid import StepGrid, STEP_GRID_METRICS
 
 
 class DrumGridBuilder:
@@ -35,12 +38,44 @@ class DrumGridBuilder:
         self.window = window
         self.main_container = None
         self.drum_parts_column = None
+        # The parts the column's buttons were built for
+        self._column_parts = None
+        # Instrument buttons by part id, for as long as they are in the column
+        self._instrument_buttons = {}
+        self.playhead_beat = -1
+        self.step_grid_metrics = STEP_GRID_METRICS["regular"]
+        # Pages dropped from the carousel, waiting to be bound to a new index
+        self._page_pool = []
+        self._populate_source_id = 0
+        # Work deferred while a batch update is running
+        self._batch_depth = 0
+        self._pending_parts_column = False
+        self._pending_carousel_focus = None
+        self._pending_page_reset = False
+        self._pending_redraw = False
+        # Holds playback snapshots back while a paint stroke is running
+        self._stroke_snapshots = None
+        self._publish_source_id = 0
 
     @property
     def beats_per_page(self):
         """Get the current number of beats per page from the grid builder."""
         return self.window.drum_machine_service.beats_per_page
 
+    @property
+    def pattern(self):
+        return self.window.drum_machine_service.pattern
+
+    def get_part_ids(self):
+        """Part ids in display order, one per step grid row"""
+        drum_parts = self.window.sound_service.drum_part_manager.get_all_parts()
+        return [drum_part.id for drum_part in drum_parts]
+
+    def get_part_name(self, part_id):
+        drum_part_manager = self.window.sound_service.drum_part_manager
+        drum_part = drum_part_manager.get_part_by_id(part_id)
+        return drum_part.name if drum_part else part_id
+
     def build_drum_machine_interface(self):
         """Build the static drum machine interface and placeholders."""
         self.main_container = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
@@ -68,27 +103,184 @@ class DrumGridBuilder:
         # Build the carousel for the first time
         self.rebuild_carousel()
 
+        # Step grids draw straight from the pattern, so redraw them on changes
+        self.pattern.add_listener(self._on_pattern_changed)
+        self.window.sound_service.drum_part_manager.add_listener(
+            self._on_parts_changed
+        )
+        Adw.StyleManager.get_default().connect(
+            "notify::dark", lambda *args: self.queue_grid_redraw()
+        )
+
         return self.main_container
 
+    @contextmanager
+    def batch_update(self):
+        """Defer grid rebuilds and redraws until the block ends
+
+        Bulk edits such as loading a pattern rebuild, reset and redraw the
+        grid several times over; inside a batch each of those is only noted,
+        and the grid is brought up to date once when the outermost batch ends.
+        Playback sees the pattern edits of a batch as a single snapshot.
+        """
+        self._batch_depth += 1
+        try:
+            with self.pattern.hold_snapshots():
+                yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._flush_batch()
+
+    def _flush_batch(self):
+        if self._pending_parts_column:
+            self._pending_parts_column = False
+            self.sync_drum_parts_column()
+
+        if self._pending_carousel_focus is not None:
+            focus_beat_index = self._pending_carousel_focus
+            self._pending_carousel_focus = None
+            self._pending_page_reset = False
+            self.rebuild_carousel(focus_beat_index)
+        elif self._pending_page_reset:
+            self._pending_page_reset = False
+            self.reset_carousel_pages()
+
+        if self._pending_redraw:
+            self._pending_redraw = False
+            for grid in self._iter_page_grids():
+                grid.queue_resize()
+
+    def _on_pattern_changed(self, change: PatternChange) -> None:
+        if self._batch_depth:
+            self._pending_redraw = True
+            return
+        if change.kind in (PatternChangeKind.STEP_SET, PatternChangeKind.STEP_CLEARED):
+            if self._stroke_snapshots:
+                self._queue_stroke_publish()
+            grid = self._get_page_grid(change.step // self.beats_per_page)
+            if grid:
+                grid.queue_draw()
+        else:
+            self.queue_grid_redraw()
+
+    def _on_parts_changed(self, version):
+        if self._batch_depth:
+            self._pending_redraw = True
+            return
+        # Rows were added, removed or reordered, so the grids change size
+        for grid in self._iter_page_grids():
+            grid.queue_resize()
+
+    def _get_page_grid(self, page_index):
+        carousel = getattr(self.window, "carousel", None)
+        if carousel is None or not 0 <= page_index < carousel.get_n_pages():
+            return None
+        return carousel.get_nth_page(page_index)
+
+    def _iter_page_grids(self):
+        carousel = getattr(self.window, "carousel", None)
+        if carousel is None:
+            return
+        for page_index in range(carousel.get_n_pages()):
+            yield carousel.get_nth_page(page_index)
+
+    def queue_grid_redraw(self):
+        """Redraw every step grid from the current pattern"""
+        for grid in self._iter_page_grids():
+            grid.queue_draw()
+
+    def set_playhead_beat(self, beat_index):
+        """Move the playhead highlight, redrawing only the affected pages"""
+        if beat_index == self.playhead_beat:
+            return
+        pages = {self.playhead_beat // self.beats_per_page}
+        pages.add(beat_index // self.beats_per_page)
+        self.playhead_beat = beat_index
+        for page_index in pages:
+            grid = self._get_page_grid(page_index)
+            if grid:
+                grid.queue_draw()
+
+    def update_step_grid_metrics(self, css_classes):
+        """Resize the step grid cells to match the current breakpoint"""
+        if "compact" in css_classes:
+            metrics = STEP_GRID_METRICS["compact"]
+        elif "medium" in css_classes:
+            metrics = STEP_GRID_METRICS["medium"]
+        else:
+            metrics = STEP_GRID_METRICS["regular"]
+
+        if metrics != self.step_grid_metrics:
+            self.step_grid_metrics = metrics
+            for grid in self._iter_page_grids():
+                grid.queue_resize()
+
+    def on_step_toggled(self, part_id, beat_index, active):
+        self.window.on_step_toggled(part_id, beat_index, active)
+
+    def begin_paint_stroke(self):
+        self.window.history_service.begin_stroke()
+        self._stroke_snapshots = ExitStack()
+        self._stroke_snapshots.enter_context(self.pattern.hold_snapshots())
+
+    def end_paint_stroke(self):
+        self.window.history_service.end_stroke()
+        if self._publish_source_id:
+            GLib.source_remove(self._publish_source_id)
+            self._publish_source_id = 0
+        if self._stroke_snapshots:
+            self._stroke_snapshots.close()
+            self._stroke_snapshots = None
+
+    def _queue_stroke_publish(self):
+        """Publish the cells painted so far once per main loop iteration"""
+        if not self._publish_source_id:
+            self._publish_source_id = GLib.idle_add(self._publish_stroke)
+
+    def _publish_stroke(self):
+        self._publish_source_id = 0
+        self.pattern.publish_snapshot()
+        return GLib.SOURCE_REMOVE
+
     def rebuild_carousel(self, focus_beat_index=0):
         """Builds or rebuilds only the carousel and its indicator dots."""
-        carousel = self._create_carousel_drum_rows()
-        dots = self._create_dots_indicator(carousel)
+        if self._batch_depth:
+            self._pending_carousel_focus = focus_beat_index
+            return
 
-        if self.carousel_container.get_first_child():
-            self.carousel_container.remove(self.carousel_container.get_first_child())
+        old_carousel = self.carousel_container.get_first_child()
+        if old_carousel:
+            self.carousel_container.remove(old_carousel)
+            self._recycle_pages(old_carousel)
         if self.dots_container.get_first_child():
             self.dots_container.remove(self.dots_container.get_first_child())
 
+        carousel = self._create_carousel_drum_rows()
+        dots = self._create_dots_indicator(carousel)
+
         self.carousel_container.append(carousel)
         self.dots_container.append(dots)
 
         self.window.drum_machine_service.update_total_beats()
         new_target_page = focus_beat_index // self.beats_per_page
         self.reset_carousel_pages(new_target_page)
-        self.window.ui_helper.load_pattern_into_ui(
-            self.window.drum_machine_service.drum_parts_state
-        )
+        GLib.timeout_add(50, self._scroll_carousel_to_page_safely, new_target_page)
+
+    def reflow_carousel(self, focus_beat_index=0):
+        """Re-flow the existing pages after beats_per_page changed
+
+        Step grids take their columns from beats_per_page, so a layout
+        change only resizes them and adjusts the page count; nothing is
+        rebuilt or reloaded.
+        """
+        for grid in self._iter_page_grids():
+            grid.reflow()
+        for grid in self._page_pool:
+            grid.reflow()
+
+        new_target_page = focus_beat_index // self.beats_per_page
+        self.reset_carousel_pages(new_target_page)
         GLib.timeout_add(50, self._scroll_carousel_to_page_safely, new_target_page)
 
     def _scroll_carousel_to_page_safely(self, page_index):
@@ -121,9 +313,14 @@ class DrumGridBuilder:
 
         # Setup drop target on the column for reordering
         self.window.drag_drop_handler.setup_column_reorder_drop_target(drum_parts)
+        self._remember_column_parts()
 
         return drum_parts
 
+    def _remember_column_parts(self):
+        drum_part_manager = self.window.sound_service.drum_part_manager
+        self._column_parts = drum_part_manager.get_all_parts()
+
     def _create_carousel_drum_rows(self):
         """Create carousel with drum rows"""
         carousel = Adw.Carousel()
@@ -136,8 +333,7 @@ class DrumGridBuilder:
         carousel.add_controller(key_controller)
 
         for i in range(2):
-            page = self._create_beat_grid_page(i)
-            carousel.append(page)
+            carousel.append(self._take_page(i))
 
         return carousel
 
@@ -147,6 +343,10 @@ class DrumGridBuilder:
     def reset_carousel_pages(self, current_page_index=-1):
         """Resets the carousel pages to match the number of active pages in the current
         pattern."""
+        if self._batch_depth:
+            self._pending_page_reset = True
+            return
+
         carousel = self.window.carousel
 
         active_pages_in_pattern = self.window.drum_machine_service.active_pages
@@ -161,15 +361,63 @@ class DrumGridBuilder:
         n_pages = carousel.get_n_pages()
 
         while n_pages < desired_pages:
-            new_page = self._create_beat_grid_page(n_pages)
-            carousel.append(new_page)
+            carousel.append(self._take_page(n_pages))
             n_pages = carousel.get_n_pages()
 
         while n_pages > desired_pages:
             page_to_remove = carousel.get_nth_page(n_pages - 1)
             carousel.remove(page_to_remove)
+            self._release_page(page_to_remove)
             n_pages = carousel.get_n_pages()
 
+        self._populate_pages_near(int(round(current_page_index)))
+
+    def _populate_pages_near(self, page_index):
+        """Draw the page at page_index now and its neighbours when idle
+
+        Pages start as placeholders of the right size, so loading a long
+        pattern shows the visible page without waiting for the others.
+        """
+        current_page = self._get_page_grid(page_index)
+        if current_page:
+            current_page.populate()
+
+        if self._populate_source_id:
+            GLib.source_remove(self._populate_source_id)
+        self._populate_source_id = GLib.idle_add(
+            self._populate_neighbour_pages, page_index
+        )
+
+    def _populate_neighbour_pages(self, page_index):
+        self._populate_source_id = 0
+        for neighbour_index in (page_index + 1, page_index - 1):
+            page = self._get_page_grid(neighbour_index)
+            if page:
+                page.populate()
+        return GLib.SOURCE_REMOVE
+
+    def _take_page(self, page_index):
+        """Get a page for page_index, rebinding a pooled one when possible"""
+        if self._page_pool:
+            page = self._page_pool.pop()
+            page.set_page_index(page_index)
+            # Parts, metrics or the pattern may have changed while it was pooled
+            page.queue_resize()
+            return page
+        return self._create_beat_grid_page(page_index)
+
+    def _release_page(self, page):
+        """Keep a page removed from the carousel around for reuse"""
+        if len(self._page_pool) < CAROUSEL_PAGE_POOL_SIZE:
+            self._page_pool.append(page)
+
+    def _recycle_pages(self, carousel):
+        """Move every page of a discarded carousel into the pool"""
+        while carousel.get_n_pages():
+            page = carousel.get_nth_page(carousel.get_n_pages() - 1)
+            carousel.remove(page)
+            self._release_page(page)
+
     def _on_carousel_key_pressed(self, controller, keyval, keycode, state):
         """Handles key presses on the carousel to prevent page navigation with arrow
         keys."""
@@ -184,24 +432,11 @@ class DrumGridBuilder:
         if keyval == Gdk.KEY_Right:
             current_page_index = self.window.carousel.get_position()
             target_beat_index = int(current_page_index * self.beats_per_page)
-            try:
-                target_toggle = getattr(
-                    self.window, f"{drum_part}_toggle_{target_beat_index}"
-                )
-                target_toggle.grab_focus()
-                return True
-            except AttributeError as e:
-                logging.debug(
-                    f"Toggle not found during navigation: "
-                    f"{drum_part}_toggle_{target_beat_index}: {e}"
-                )
-                return True
+            return self._focus_target_step(drum_part, target_beat_index)
         return False
 
-    def _on_toggle_key_pressed(
-        self, controller, keyval, keycode, state, drum_part, global_beat_index
-    ):
-        """Handles arrow key navigation between toggle buttons."""
+    def on_step_key_pressed(self, keyval, drum_part, global_beat_index):
+        """Handles left and right arrow key navigation between steps."""
         if keyval == Gdk.KEY_Right:
             return self._handle_right_arrow(drum_part, global_beat_index)
         elif keyval == Gdk.KEY_Left:
@@ -217,16 +452,16 @@ class DrumGridBuilder:
         return self._navigate_to_target(drum_part, global_beat_index, target_beat_index)
 
     def _scroll_to_next_page(self, drum_part, global_beat_index):
-        """Scroll to next page and focus the leftmost toggle."""
+        """Scroll to next page and focus the leftmost step."""
         carousel = self.window.carousel
         current_page = global_beat_index // self.beats_per_page
         n_pages = carousel.get_n_pages()
 
         if current_page < n_pages - 1:
             carousel.scroll_to(carousel.get_nth_page(current_page + 1), True)
-            # Focus the leftmost toggle on the next page
+            # Focus the leftmost step on the next page
             target_beat_index = (current_page + 1) * self.beats_per_page
-            return self._focus_target_toggle(drum_part, target_beat_index)
+            return self._focus_target_step(drum_part, target_beat_index)
 
         # If we're on the last page, stay where we are
         return True
@@ -241,37 +476,38 @@ class DrumGridBuilder:
         return self._navigate_to_target(drum_part, global_beat_index, target_beat_index)
 
     def _scroll_to_previous_page(self, drum_part, global_beat_index):
-        """Scroll to previous page and focus the rightmost toggle."""
+        """Scroll to previous page and focus the rightmost step."""
         carousel = self.window.carousel
         current_page = global_beat_index // self.beats_per_page
 
         if current_page > 0:
             carousel.scroll_to(carousel.get_nth_page(current_page - 1), True)
-            # Focus the rightmost toggle on the previous page
+            # Focus the rightmost step on the previous page
             target_beat_index = (current_page - 1) * self.beats_per_page + (
                 self.beats_per_page - 1
             )
-            return self._focus_target_toggle(drum_part, target_beat_index)
+            return self._focus_target_step(drum_part, target_beat_index)
 
         # If we're on the first page, go to instrument button
         return self._navigate_to_instrument_button(drum_part)
 
     def _navigate_to_instrument_button(self, drum_part):
         """Navigate to the instrument button."""
-        try:
-            instrument_button = getattr(self.window, f"{drum_part}_instrument_button")
+        instrument_button = self.get_instrument_button(drum_part)
+        if instrument_button:
             instrument_button.grab_focus()
-            return True
-        except AttributeError as e:
-            logging.debug(
-                f"Instrument button not found: {drum_part}_instrument_button: {e}"
-            )
-            return True
+        else:
+            logging.debug(f"Instrument button not found: {drum_part}")
+        return True
+
+    def get_instrument_button(self, part_id):
+        """The column's instrument button for a part, or None"""
+        return self._instrument_buttons.get(part_id)
 
     def _navigate_to_target(self, drum_part, global_beat_index, target_beat_index):
-        """Navigate to target toggle button."""
+        """Navigate to target step."""
         self._scroll_if_needed(global_beat_index, target_beat_index)
-        return self._focus_target_toggle(drum_part, target_beat_index)
+        return self._focus_target_step(drum_part, target_beat_index)
 
     def _scroll_if_needed(self, global_beat_index, target_beat_index):
         """Scroll carousel if crossing page boundary."""
@@ -284,19 +520,12 @@ class DrumGridBuilder:
             if 0 <= target_page_index < n_pages:
                 carousel.scroll_to(carousel.get_nth_page(target_page_index), True)
 
-    def _focus_target_toggle(self, drum_part, target_beat_index):
-        """Focus the target toggle button."""
-        try:
-            target_toggle = getattr(
-                self.window, f"{drum_part}_toggle_{target_beat_index}"
-            )
-            target_toggle.grab_focus()
-            return True
-        except AttributeError as e:
-            logging.debug(
-                f"Target toggle not found: {drum_part}_toggle_{target_beat_index}: {e}"
-            )
-            return True
+    def _focus_target_step(self, drum_part, target_beat_index):
+        """Focus the target step in its page's grid."""
+        grid = self._get_page_grid(target_beat_index // self.beats_per_page)
+        if not grid or not grid.focus_step(drum_part, target_beat_index):
+            logging.debug(f"Target step not found: {drum_part} {target_beat_index}")
+        return True
 
     def _setup_instrument_button_right_click(self, button, drum_part):
         """Setup right-click gesture for instrument button to remove drum part"""
@@ -432,34 +661,7 @@ class DrumGridBuilder:
 
     def _create_beat_grid_page(self, page_index):
         """Creates a single page containing a full set of instrument tracks."""
-        page = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
-
-        # Get drum parts from the sound service
-        drum_part_manager = self.window.sound_service.drum_part_manager
-        for drum_part in drum_part_manager.get_all_parts():
-            drum_row = self.create_drum_row(drum_part.id, page_index)
-            page.append(drum_row)
-        return page
-
-    def create_drum_row(self, drum_part, page_index):
-        """Create a complete row for a drum part"""
-        instrument_container = Gtk.Box(
-            orientation=Gtk.Orientation.HORIZONTAL, spacing=10
-        )
-        num_beat_groups = (
-            self.beats_per_page + GROUP_TOGGLE_COUNT - 1
-        ) // GROUP_TOGGLE_COUNT
-
-        for group_index in range(num_beat_groups):
-            beat_group = self.create_beat_toggle_group(
-                drum_part, group_index, page_index
-            )
-            instrument_container.append(beat_group)
-
-            if group_index != num_beat_groups - 1:
-                beat_group.set_margin_end(20)
-
-        return instrument_container
+        return StepGrid(self, page_index)
 
     def _create_drum_button(self, label, tooltip_text, clickable=True, drum_part=None):
         """Create a drum button with consistent styling"""
@@ -487,7 +689,7 @@ class DrumGridBuilder:
             # Add right-click gesture for removing drum parts
             self._setup_instrument_button_right_click(button, drum_part)
 
-            setattr(self.window, f"{drum_part.id}_instrument_button", button)
+            self._instrument_buttons[drum_part.id] = button
 
             # Setup drag and drop for replacement
 
@@ -586,11 +788,11 @@ class DrumGridBuilder:
                 return
 
             # Find and update the button
-            button_attr = f"{drum_id}_instrument_button"
-            if hasattr(self.window, button_attr):
-                button = getattr(self.window, button_attr)
+            button = self.get_instrument_button(drum_id)
+            if button:
                 # Use the shared logic
                 self.update_button_content(button, drum_part)
+                self._remember_column_parts()
             else:
                 # Button doesn't exist, rebuild the drum parts column
                 self.rebuild_drum_parts_column()
@@ -601,23 +803,13 @@ class DrumGridBuilder:
             # Fallback: rebuild the drum parts column
             self.rebuild_drum_parts_column()
 
-    def create_beat_toggle_group(self, drum_part, group_index, page_index):
-        """Create a group of beat toggles"""
-        beat_group = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
-
-        for position in range(GROUP_TOGGLE_COUNT):
-            beat_number_on_page = group_index * GROUP_TOGGLE_COUNT + position + 1
-            if beat_number_on_page > self.beats_per_page:
-                break
-            beat_toggle = self.create_single_beat_toggle(
-                drum_part, beat_number_on_page, page_index
-            )
-            beat_group.append(beat_toggle)
-
-        return beat_group
-
     def rebuild_drum_parts_column(self):
         """Rebuild the drum parts column to reflect current drum parts"""
+        if self._batch_depth:
+            self._column_parts = None
+            self._pending_parts_column = True
+            return
+
         try:
             # Get the current drum parts column
             if not self.drum_parts_column:
@@ -626,44 +818,87 @@ class DrumGridBuilder:
             # Clear existing children
             while self.drum_parts_column.get_first_child():
                 self.drum_parts_column.remove(self.drum_parts_column.get_first_child())
+            self._instrument_buttons.clear()
 
             # Rebuild with current drum parts
             drum_part_manager = self.window.sound_service.drum_part_manager
             for drum_part in drum_part_manager.get_all_parts():
                 instrument_button = self.create_instrument_button(drum_part)
                 self.drum_parts_column.append(instrument_button)
+            self._remember_column_parts()
 
         except Exception as e:
             logging.error(f"Error rebuilding drum parts column: {e}", exc_info=True)
 
-    def create_single_beat_toggle(self, drum_part, beat_number_on_page, page_index):
-        """Create a single beat toggle button"""
-        global_beat_index = page_index * self.beats_per_page + (beat_number_on_page - 1)
-
-        beat_toggle = Gtk.ToggleButton()
-        beat_toggle.set_size_request(20, 20)
-        beat_toggle.set_name(f"{drum_part}_toggle_{global_beat_index}")
-        beat_toggle.set_valign(Gtk.Align.CENTER)
-        beat_toggle.add_css_class("drum-toggle")
-        beat_toggle.connect(
-            "toggled", self.window.on_toggle_changed, drum_part, global_beat_index
-        )
+    def sync_drum_parts_column(self):
+        """Update the drum parts column for the current parts, rebuilding only
+        when needed
 
-        toggle_key_controller = Gtk.EventControllerKey.new()
-        toggle_key_controller.connect(
-            "key-pressed", self._on_toggle_key_pressed, drum_part, global_beat_index
-        )
-        beat_toggle.add_controller(toggle_key_controller)
+        Parts appended since the column was built, such as the temporary
+        parts of a loaded pattern, only get new buttons; any other change
+        rebuilds the column.
+        """
+        if self._batch_depth:
+            self._pending_parts_column = True
+            return
 
-        right_click_gesture = Gtk.GestureClick.new()
-        right_click_gesture.set_button(Gdk.BUTTON_SECONDARY)
-        right_click_gesture.connect(
-            "released", self.window._on_right_click_released, beat_toggle
-        )
-        beat_toggle.add_controller(right_click_gesture)
+        drum_parts = self.window.sound_service.drum_part_manager.get_all_parts()
+        shown_parts = self._column_parts
+        if shown_parts is not None and tuple(drum_parts) == shown_parts:
+            return
+        if (
+            shown_parts is None
+            or not self.drum_parts_column
+            or tuple(drum_parts[: len(shown_parts)]) != shown_parts
+        ):
+            self.rebuild_drum_parts_column()
+            return
 
-        setattr(self.window, f"{drum_part}_toggle_{global_beat_index}", beat_toggle)
-        return beat_toggle
+        for index in range(len(shown_parts), len(drum_parts)):
+            instrument_button = self.create_instrument_button(drum_parts[index])
+            self.drum_parts_column.append(instrument_button)
+        self._remember_column_parts()
+
+    def move_drum_part_row(self, part_id):
+        """Move a part's button to its new place in the column after a reorder
+
+        The step grids take their row order from the part list, so they only
+        need the redraw they get from the part manager.
+        """
+        container = self._get_instrument_container(part_id)
+        if self._batch_depth or container is None:
+            self.rebuild_drum_parts_column()
+            return
+
+        drum_part_manager = self.window.sound_service.drum_part_manager
+        index = drum_part_manager.get_part_index(part_id)
+        previous_container = None
+        if index > 0:
+            previous_part = drum_part_manager.get_all_parts()[index - 1]
+            previous_container = self._get_instrument_container(previous_part.id)
+        self.drum_parts_column.reorder_child_after(container, previous_container)
+        self._remember_column_parts()
+
+    def remove_drum_part_row(self, part_id):
+        """Remove a part's button from the column after the part was removed"""
+        container = self._get_instrument_container(part_id)
+        if self._batch_depth or container is None:
+            self.rebuild_drum_parts_column()
+        else:
+            self.drum_parts_column.remove(container)
+            del self._instrument_buttons[part_id]
+            self._remember_column_parts()
+        # The pattern may need fewer pages without the part's steps
+        self.reset_carousel_pages()
+
+    def _get_instrument_container(self, part_id):
+        button = self.get_instrument_button(part_id)
+        if button is None or not self.drum_parts_column:
+            return None
+        container = button.get_parent()
+        if container is None or container.get_parent() != self.drum_parts_column:
+            return None
+        return container
 
     def update_drum_parts_spacing(self, is_compact):
         """Updates the spacing of the drum parts column."""
@@ -673,18 +908,12 @@ class DrumGridBuilder:
 
     def add_drum_part(self, drum_part):
         """Add a new drum part to the existing interface"""
-        # Add new instrument button to drum parts column
+        # Add new instrument button to drum parts column; the step grids
+        # grow a row by themselves when the part list changes
         if self.drum_parts_column:
             instrument_button = self.create_instrument_button(drum_part)
             self.drum_parts_column.append(instrument_button)
-
-        # Add new drum row to each carousel page
-        if hasattr(self.window, "carousel"):
-            n_pages = self.window.carousel.get_n_pages()
-            for page_index in range(n_pages):
-                page = self.window.carousel.get_nth_page(page_index)
-                drum_row = self.create_drum_row(drum_part.id, page_index)
-                page.append(drum_row)
+            self._remember_column_parts()
 
     def _create_placeholder_button_container(self):
         """Create a placeholder button container"""
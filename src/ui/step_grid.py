@@ -0,0 +1,412 @@
+# ui/step_grid.py
+#
+# Copyright 2025 revisto
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import gi
+import numpy as np
+from dataclasses import dataclass, fields
+from typing import Optional, Tuple
+
+gi.require_version("Gtk", "4.0")
+gi.require_version("Gdk", "4.0")
+gi.require_version("Gsk", "4.0")
+gi.require_version("Graphene", "1.0")
+from gi.repository import Gtk, Gdk, Gsk, Graphene
+from gettext import gettext as _
+from ..config.constants import GROUP_TOGGLE_COUNT
+
+
+@dataclass(frozen=True)
+class StepGridMetrics:
+    """Cell geometry, matching the toggle buttons the grid replaces"""
+
+    cell_width: int
+    cell_height: int
+    cell_spacing: int = 5
+    group_spacing: int = 30
+    row_spacing: int = 10
+    radius: float = 6.0
+
+    @property
+    def row_pitch(self) -> int:
+        return self.cell_height + self.row_spacing
+
+    def get_column_x(self, column: int) -> int:
+        groups = column // GROUP_TOGGLE_COUNT
+        return column * (self.cell_width + self.cell_spacing) + groups * (
+            self.group_spacing - self.cell_spacing
+        )
+
+
+# Metrics for each layout size of the drum machine box
+STEP_GRID_METRICS = {
+    "regular": StepGridMetrics(cell_width=36, cell_height=34),
+    "medium": StepGridMetrics(cell_width=28, cell_height=28),
+    "compact": StepGridMetrics(cell_width=20, cell_height=20),
+}
+
+
+@dataclass(frozen=True)
+class StepGridPalette:
+    """Cell colours of one draw, read from the grid's CSS"""
+
+    cell: Gdk.RGBA
+    hover: Gdk.RGBA
+    checked: Gdk.RGBA
+    playhead: Gdk.RGBA
+    focus: Gdk.RGBA
+
+
+class StepGridCell(Gtk.Widget):
+    """Hidden "cell" style node whose CSS color is one cell state's colour"""
+
+    __gtype_name__ = "DrumMachineStepGridCell"
+
+
+PLAYHEAD_GLOW_RADIUS = 10.0
+FOCUS_RING_WIDTH = 2.0
+
+
+class StepGrid(Gtk.Widget):
+    """One carousel page of steps for every drum part, drawn as one widget
+
+    Cells are painted straight from the pattern in do_snapshot, and clicks,
+    drags and keys are hit-tested here, so a page costs a single widget and
+    a handful of controllers however many parts it shows.
+    """
+
+    __gtype_name__ = "DrumMachineStepGrid"
+
+    def __init__(self, grid_builder, page_index: int) -> None:
+        super().__init__(accessible_role=Gtk.AccessibleRole.GRID)
+        self.grid_builder = grid_builder
+        self.page_index = page_index
+        self._hover_cell: Optional[Tuple[int, int]] = None
+        self._focus_cell: Tuple[int, int] = (0, 0)
+        self._paint_state: Optional[bool] = None
+        # Placeholders keep their size but draw nothing until populated
+        self.populated = False
+
+        self.set_focusable(True)
+        self.add_css_class("step-grid")
+        self._setup_style_nodes()
+        self._setup_controllers()
+        self._update_accessible_label()
+
+    def _setup_style_nodes(self) -> None:
+        """Add one hidden cell node per palette entry for themes to style
+
+        The plain cell takes the "cell" rule and every other state its class,
+        e.g. `.step-grid cell.checked`, so the colours stay in style.css.
+        """
+        self._style_nodes = {}
+        for state in fields(StepGridPalette):
+            classes = [] if state.name == "cell" else [state.name]
+            node = StepGridCell(css_name="cell", css_classes=classes, visible=False)
+            node.set_parent(self)
+            self._style_nodes[state.name] = node
+
+    def do_dispose(self) -> None:
+        for node in self._style_nodes.values():
+            node.unparent()
+        self._style_nodes.clear()
+        Gtk.Widget.do_dispose(self)
+
+    def _setup_controllers(self) -> None:
+        paint_gesture = Gtk.GestureDrag.new()
+        paint_gesture.set_button(Gdk.BUTTON_PRIMARY)
+        paint_gesture.connect("drag-begin", self._on_paint_begin)
+        paint_gesture.connect("drag-update", self._on_paint_update)
+        paint_gesture.connect("drag-end", self._on_paint_end)
+        self.add_controller(paint_gesture)
+
+        right_click_gesture = Gtk.GestureClick.new()
+        right_click_gesture.set_button(Gdk.BUTTON_SECONDARY)
+        right_click_gesture.connect("released", self._on_right_click_released)
+        self.add_controller(right_click_gesture)
+
+        motion_controller = Gtk.EventControllerMotion.new()
+        motion_controller.connect("motion", self._on_motion)
+        motion_controller.connect("leave", self._on_leave)
+        self.add_controller(motion_controller)
+
+        key_controller = Gtk.EventControllerKey.new()
+        key_controller.connect("key-pressed", self._on_key_pressed)
+        self.add_controller(key_controller)
+
+        focus_controller = Gtk.EventControllerFocus.new()
+        focus_controller.connect("enter", lambda *args: self.queue_draw())
+        focus_controller.connect("leave", lambda *args: self.queue_draw())
+        self.add_controller(focus_controller)
+
+    @property
+    def first_beat(self) -> int:
+        return self.page_index * self.grid_builder.beats_per_page
+
+    def set_page_index(self, page_index: int) -> None:
+        """Rebind this grid to another page of the pattern
+
+        Cell states are read from the pattern on every draw, so rebinding
+        only has to reset the per-page interaction state and redraw.
+        """
+        self._hover_cell = None
+        self._paint_state = None
+        if page_index == self.page_index:
+            return
+        self.page_index = page_index
+        self.populated = False
+        self._update_accessible_label()
+        self._update_accessible_description()
+        self.queue_draw()
+
+    def reflow(self) -> None:
+        """Lay the grid out again after the number of beats per page changed"""
+        row, column = self._focus_cell
+        self._focus_cell = (row, min(column, self._get_columns() - 1))
+        self._hover_cell = None
+        self._update_accessible_description()
+        self.queue_resize()
+
+    def populate(self) -> None:
+        """Turn a placeholder into a drawn page"""
+        if not self.populated:
+            self.populated = True
+            self.queue_draw()
+
+    def get_focused_part_id(self) -> Optional[str]:
+        part_ids = self.grid_builder.get_part_ids()
+        row = self._focus_cell[0]
+        return part_ids[row] if row < len(part_ids) else None
+
+    def focus_step(self, part_id: str, beat_index: int) -> bool:
+        """Move keyboard focus to one cell, given its part and global beat"""
+        part_ids = self.grid_builder.get_part_ids()
+        column = beat_index - self.first_beat
+        if part_id not in part_ids or not 0 <= column < self._get_columns():
+            return False
+        self.populate()
+        self._set_focus_cell(part_ids.index(part_id), column)
+        self.grab_focus()
+        return True
+
+    def do_measure(self, orientation, for_size):
+        metrics = self.grid_builder.step_grid_metrics
+        if orientation == Gtk.Orientation.HORIZONTAL:
+            columns = self._get_columns()
+            size = metrics.get_column_x(columns - 1) + metrics.cell_width
+        else:
+            rows = len(self.grid_builder.get_part_ids())
+            size = max(rows * metrics.row_pitch - metrics.row_spacing, 0)
+        return size, size, -1, -1
+
+    def do_snapshot(self, snapshot) -> None:
+        if not self.populated:
+            return
+        metrics = self.grid_builder.step_grid_metrics
+        palette = self._get_palette()
+        states = self._get_cell_states()
+        playhead_column = self.grid_builder.playhead_beat - self.first_beat
+
+        for row in range(states.shape[0]):
+            for column in range(states.shape[1]):
+                rect = Graphene.Rect().init(
+                    metrics.get_column_x(column),
+                    row * metrics.row_pitch,
+                    metrics.cell_width,
+                    metrics.cell_height,
+                )
+                rounded = Gsk.RoundedRect()
+                rounded.init_from_rect(rect, metrics.radius)
+                is_playhead = column == playhead_column
+
+                if is_playhead:
+                    snapshot.append_outset_shadow(
+                        rounded, palette.playhead, 0, 0, 0, PLAYHEAD_GLOW_RADIUS
+                    )
+                color = self._get_cell_color(
+                    palette,
+                    states[row, column],
+                    (row, column) == self._hover_cell,
+                    is_playhead,
+                )
+                snapshot.push_rounded_clip(rounded)
+                snapshot.append_color(color, rect)
+                snapshot.pop()
+
+                if self.has_focus() and (row, column) == self._focus_cell:
+                    snapshot.append_border(
+                        rounded, [FOCUS_RING_WIDTH] * 4, [palette.focus] * 4
+                    )
+
+    def _get_cell_color(
+        self, palette: StepGridPalette, active: bool, hover: bool, playhead: bool
+    ) -> Gdk.RGBA:
+        if active:
+            return palette.checked
+        if hover:
+            return palette.hover
+        if playhead:
+            return palette.playhead
+        return palette.cell
+
+    def _get_palette(self) -> StepGridPalette:
+        return StepGridPalette(
+            **{state: node.get_color() for state, node in self._style_nodes.items()}
+        )
+
+    def _get_columns(self) -> int:
+        return self.grid_builder.beats_per_page
+
+    def _get_cell_states(self) -> np.ndarray:
+        """Active state of every cell on this page, in display row order"""
+        part_ids = self.grid_builder.get_part_ids()
+        columns = self._get_columns()
+        states = np.zeros((len(part_ids), columns), dtype=np.bool_)
+
+        pattern = self.grid_builder.pattern
+        first_beat = self.first_beat
+        last_beat = min(first_beat + columns, pattern.step_capacity)
+        if last_beat <= first_beat:
+            return states
+
+        width = last_beat - first_beat
+        pattern_rows = {part_id: row for row, part_id in enumerate(pattern.part_ids)}
+        matrix = pattern.matrix
+        for row, part_id in enumerate(part_ids):
+            pattern_row = pattern_rows.get(part_id)
+            if pattern_row is not None:
+                states[row, :width] = matrix[pattern_row, first_beat:last_beat]
+        return states
+
+    def _get_cell_at(self, x: float, y: float) -> Optional[Tuple[int, int]]:
+        """Hit-test a point, returning (row, column) of the cell under it"""
+        metrics = self.grid_builder.step_grid_metrics
+        if x < 0 or y < 0:
+            return None
+
+        row = int(y // metrics.row_pitch)
+        if row >= len(self.grid_builder.get_part_ids()):
+            return None
+        if y - row * metrics.row_pitch >= metrics.cell_height:
+            return None
+
+        for column in range(self._get_columns()):
+            left = metrics.get_column_x(column)
+            if left <= x < left + metrics.cell_width:
+                return row, column
+        return None
+
+    def _get_step(self, cell: Tuple[int, int]) -> Tuple[str, int]:
+        row, column = cell
+        return self.grid_builder.get_part_ids()[row], self.first_beat + column
+
+    def _is_cell_active(self, cell: Tuple[int, int]) -> bool:
+        part_id, beat_index = self._get_step(cell)
+        return self.grid_builder.pattern.is_active(part_id, beat_index)
+
+    def _set_cell(self, cell: Tuple[int, int], active: bool) -> None:
+        part_id, beat_index = self._get_step(cell)
+        self.grid_builder.on_step_toggled(part_id, beat_index, active)
+
+    def _set_focus_cell(self, row: int, column: int) -> None:
+        self._focus_cell = (row, column)
+        self._update_accessible_description()
+        self.queue_draw()
+
+    def _on_paint_begin(self, gesture, x: float, y: float) -> None:
+        cell = self._get_cell_at(x, y)
+        if cell is None:
+            self._paint_state = None
+            return
+
+        self.grab_focus()
+        self._set_focus_cell(*cell)
+        self._paint_state = not self._is_cell_active(cell)
+        self.grid_builder.begin_paint_stroke()
+        self._set_cell(cell, self._paint_state)
+
+    def _on_paint_update(self, gesture, offset_x: float, offset_y: float) -> None:
+        if self._paint_state is None:
+            return
+        _, start_x, start_y = gesture.get_start_point()
+        cell = self._get_cell_at(start_x + offset_x, start_y + offset_y)
+        if cell is not None and self._is_cell_active(cell) != self._paint_state:
+            self._set_cell(cell, self._paint_state)
+
+    def _on_paint_end(self, gesture, offset_x: float, offset_y: float) -> None:
+        if self._paint_state is not None:
+            self._paint_state = None
+            self.grid_builder.end_paint_stroke()
+
+    def _on_right_click_released(self, gesture, n_press: int, x: float, y: float):
+        cell = self._get_cell_at(x, y)
+        if cell is not None:
+            self._set_cell(cell, not self._is_cell_active(cell))
+
+    def _on_motion(self, controller, x: float, y: float) -> None:
+        cell = self._get_cell_at(x, y)
+        if cell != self._hover_cell:
+            self._hover_cell = cell
+            self.queue_draw()
+
+    def _on_leave(self, controller) -> None:
+        if self._hover_cell is not None:
+            self._hover_cell = None
+            self.queue_draw()
+
+    def _on_key_pressed(self, controller, keyval, keycode, state) -> bool:
+        rows = len(self.grid_builder.get_part_ids())
+        if not rows:
+            return False
+        row, column = self._focus_cell
+        row = min(row, rows - 1)
+
+        if keyval in (Gdk.KEY_Return, Gdk.KEY_KP_Enter, Gdk.KEY_space):
+            self._set_cell((row, column), not self._is_cell_active((row, column)))
+            self._update_accessible_description()
+            return True
+        if keyval == Gdk.KEY_Up:
+            self._set_focus_cell(max(row - 1, 0), column)
+            return True
+        if keyval == Gdk.KEY_Down:
+            self._set_focus_cell(min(row + 1, rows - 1), column)
+            return True
+        if keyval in (Gdk.KEY_Left, Gdk.KEY_Right):
+            part_id, beat_index = self._get_step((row, column))
+            return self.grid_builder.on_step_key_pressed(keyval, part_id, beat_index)
+        return False
+
+    def _update_accessible_label(self) -> None:
+        label = _("Beat grid, page {}").format(self.page_index + 1)
+        self.update_property([Gtk.AccessibleProperty.LABEL], [label])
+
+    def _update_accessible_description(self) -> None:
+        part_ids = self.grid_builder.get_part_ids()
+        row, column = self._focus_cell
+        if row >= len(part_ids):
+            return
+        part_id, beat_index = self._get_step((row, column))
+        if self.grid_builder.pattern.is_active(part_id, beat_index):
+            description = _("{}, beat {}, on")
+        else:
+            description = _("{}, beat {}, off")
+        name = self.grid_builder.get_part_name(part_id)
+        self.update_property(
+            [Gtk.AccessibleProperty.DESCRIPTION],
+            [description.format(name, beat_index + 1)],
+        )
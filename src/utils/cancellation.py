@@ -0,0 +1,81 @@
+# utils/cancellation.py
+#
+# Copyright 2025 revisto
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import logging
+import subprocess
+import threading
+from typing import Dict
+
+
+class ExportCancelled(Exception):
+    """Raised by a worker stage when its cancellation token was triggered"""
+
+
+class CancellationToken:
+    """Cooperative cancellation shared by the stages of a background job
+
+    Workers poll the token at block granularity, while subprocesses
+    registered with it are killed the moment cancel() is called.
+    """
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._processes: Dict[str, subprocess.Popen] = {}
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Cancel the job and kill every registered subprocess"""
+        self._event.set()
+        with self._lock:
+            processes = list(self._processes.values())
+        for process in processes:
+            self.kill_process(process)
+
+    def raise_if_cancelled(self) -> None:
+        """Abort the current stage if the job was cancelled"""
+        if self._event.is_set():
+            raise ExportCancelled()
+
+    def register_process(self, key: str, process: subprocess.Popen) -> None:
+        """Track a subprocess so that cancel() can kill it"""
+        with self._lock:
+            self._processes[key] = process
+        # Close the window between a cancel() and the registration
+        if self._event.is_set():
+            self.kill_process(process)
+
+    def unregister_process(self, key: str) -> None:
+        with self._lock:
+            self._processes.pop(key, None)
+
+    def get_process(self, key: str):
+        with self._lock:
+            return self._processes.get(key)
+
+    @staticmethod
+    def kill_process(process: subprocess.Popen) -> None:
+        if process.poll() is None:
+            try:
+                process.kill()
+            except Exception as e:
+                logging.debug(f"Failed to kill process {process.pid}: {e}")
@@ -19,12 +19,11 @@
 
 import threading
 import time
-import logging
 from enum import Enum
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from gi.repository import GLib, Gtk, Adw
 from gettext import gettext as _
-from ..config.constants import PULSE_INTERVAL_SECONDS
+from ..config.constants import ETA_MIN_FRACTION
 
 
 class ExportPhase(Enum):
@@ -33,8 +32,27 @@ class ExportPhase(Enum):
     SAVING = "saving"
 
 
+class ExportTargetStatus(Enum):
+    ENCODING = "encoding"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+# Share of the overall progress bar covered by each phase
+PHASE_PROGRESS_RANGES: Dict[ExportPhase, Tuple[float, float]] = {
+    ExportPhase.PREPARING: (0.0, 0.1),
+    ExportPhase.RENDERING: (0.1, 0.4),
+    ExportPhase.SAVING: (0.4, 1.0),
+}
+
+
 class ExportProgressHandler:
-    """Handles export progress updates and UI thread coordination"""
+    """Handles export progress updates and UI thread coordination
+
+    Worker threads report progress as often as they like; the latest value
+    is kept and applied to the widgets at most once per frame.
+    """
 
     def __init__(
         self,
@@ -48,151 +66,110 @@ class ExportProgressHandler:
         self.status_label = status_label
         self.detail_label = detail_label
 
-        self.pulse_thread: Optional[threading.Thread] = None
-        self.pulse_stop_event: Optional[threading.Event] = None
         self.is_active: bool = False
+        self.target_statuses: Dict[str, ExportTargetStatus] = {}
+        self._lock = threading.Lock()
+        self._phase: ExportPhase = ExportPhase.PREPARING
+        self._phase_fraction: float = 0.0
+        self._update_scheduled: bool = False
+        self._start_time: Optional[float] = None
 
     def start_progress_tracking(self) -> None:
-        """Start showing progress UI and pulse updates"""
+        """Start showing progress UI"""
         self.is_active = True
+        self.target_statuses = {}
+        self._phase = ExportPhase.PREPARING
+        self._phase_fraction = 0.0
+        self._start_time = time.monotonic()
+        self.progress_bar.set_fraction(0.0)
         self.progress_bar.set_visible(True)
         self.status_overlay.set_visible(True)
-        self._start_pulse_thread()
 
     def stop_progress_tracking(self):
         """Stop progress tracking and hide UI"""
         self.is_active = False
         self.progress_bar.set_visible(False)
         self.status_overlay.set_visible(False)
-        self._stop_pulse_thread()
-
-    def update_phase(self, phase: ExportPhase):
-        """Update the progress UI for the current export phase"""
-
-        def update_ui():
-            self.progress_bar.pulse()
-
-            if phase == ExportPhase.PREPARING:
-                self.status_label.set_label(_("Preparing…"))
-                self.detail_label.set_label(_("Initializing…"))
-            elif phase == ExportPhase.RENDERING:
-                self.status_label.set_label(_("Rendering audio…"))
-                self.detail_label.set_label(_("Processing beats…"))
-            elif phase == ExportPhase.SAVING:
-                self.status_label.set_label(_("Saving file…"))
-                self.detail_label.set_label(_("Writing to disk…"))
-            else:
-                self.status_label.set_label(_("Exporting…"))
-                self.detail_label.set_label(_("Processing…"))
-
-        GLib.idle_add(update_ui)
-
-    def _start_pulse_thread(self):
-        """Start background thread for progress bar pulsing"""
-        if self.pulse_thread and self.pulse_thread.is_alive():
-            return
-
-        self.pulse_stop_event = threading.Event()
-
-        def pulse_worker():
-            while not self.pulse_stop_event.is_set() and self.is_active:
-                GLib.idle_add(self.progress_bar.pulse)
-                time.sleep(PULSE_INTERVAL_SECONDS)
 
-        self.pulse_thread = threading.Thread(target=pulse_worker, daemon=True)
-        self.pulse_thread.start()
-
-    def _stop_pulse_thread(self):
-        """Stop the pulse thread"""
-        if self.pulse_stop_event:
-            self.pulse_stop_event.set()
-        if self.pulse_thread and self.pulse_thread.is_alive():
-            self.pulse_thread.join(timeout=1.1)
-
-
-class ExportTask:
-    """Manages the background export operation"""
-
-    def __init__(self, audio_export_service, progress_handler: ExportProgressHandler):
-        self.audio_export_service = audio_export_service
-        self.progress_handler = progress_handler
-        self.export_thread = None
-        self.is_cancelled = False
-        self.current_process = None
+    def update_phase(self, phase: ExportPhase, fraction: float = 0.0):
+        """Record progress within the current export phase
+
+        Safe to call from any thread and at any rate.
+        """
+        with self._lock:
+            self._phase = phase
+            self._phase_fraction = fraction
+            schedule = not self._update_scheduled
+            self._update_scheduled = True
+
+        if schedule:
+            GLib.idle_add(self._schedule_frame_update)
+
+    def update_target_status(self, file_path: str, status: ExportTargetStatus):
+        """Record the status of one target of a multi-target export"""
+        with self._lock:
+            self.target_statuses[file_path] = status
+        self.update_phase(self._phase, self._phase_fraction)
+
+    def get_overall_fraction(self) -> float:
+        """Get the progress of the whole export from 0.0 to 1.0"""
+        start, end = PHASE_PROGRESS_RANGES[self._phase]
+        return start + (end - start) * min(1.0, max(0.0, self._phase_fraction))
+
+    def get_remaining_seconds(self) -> Optional[float]:
+        """Estimate the remaining export time from the progress so far"""
+        fraction = self.get_overall_fraction()
+        if self._start_time is None or fraction < ETA_MIN_FRACTION:
+            return None
+        elapsed = time.monotonic() - self._start_time
+        return elapsed * (1.0 - fraction) / fraction
+
+    def _schedule_frame_update(self):
+        """Apply the pending update on the next frame of the progress bar"""
+        if self.progress_bar.get_mapped():
+            self.progress_bar.add_tick_callback(self._on_frame_tick)
+        else:
+            self._apply_pending_update()
+        return GLib.SOURCE_REMOVE
+
+    def _on_frame_tick(self, widget, frame_clock):
+        self._apply_pending_update()
+        return GLib.SOURCE_REMOVE
+
+    def _apply_pending_update(self):
+        """Push the latest recorded progress to the widgets"""
+        with self._lock:
+            self._update_scheduled = False
+            phase = self._phase
+            statuses = list(self.target_statuses.values())
+
+        if not self.is_active:
+            return
 
-    def start_export(
-        self,
-        drum_parts_state,
-        bpm,
-        filename,
-        repeat_count,
-        metadata,
-        completion_callback,
-    ):
-        """Start the export process in a background thread"""
-        if self.export_thread and self.export_thread.is_alive():
-            return False
-
-        self.is_cancelled = False
-        self.progress_handler.start_progress_tracking()
-
-        self.export_thread = threading.Thread(
-            target=self._export_worker,
-            args=(
-                drum_parts_state,
-                bpm,
-                filename,
-                repeat_count,
-                metadata,
-                completion_callback,
-            ),
-            daemon=True,
-        )
-        self.export_thread.start()
-        return True
-
-    def cancel_export(self):
-        """Cancel the ongoing export"""
-        self.is_cancelled = True
-
-        # Kill running process immediately
-        if self.current_process and self.current_process.poll() is None:
-            try:
-                self.current_process.kill()
-            except Exception:
-                pass
-
-        self.progress_handler.stop_progress_tracking()
-
-    def _export_worker(
-        self,
-        drum_parts_state,
-        bpm,
-        filename,
-        repeat_count,
-        metadata,
-        completion_callback,
-    ):
-        """Background worker for the export process"""
-        try:
-            if self.is_cancelled:
-                return
-
-            success = self.audio_export_service.export_audio(
-                drum_parts_state,
-                bpm,
-                filename,
-                progress_callback=self.progress_handler.update_phase,
-                repeat_count=repeat_count,
-                metadata=metadata,
-                export_task=self,
+        fraction = self.get_overall_fraction()
+        self.progress_bar.set_fraction(fraction)
+        self.status_label.set_label(self._get_status_text(phase, statuses))
+        self.detail_label.set_label(self._get_detail_text(fraction))
+
+    def _get_status_text(self, phase, statuses):
+        if phase == ExportPhase.PREPARING:
+            return _("Preparing…")
+        elif phase == ExportPhase.RENDERING:
+            return _("Rendering audio…")
+        elif phase == ExportPhase.SAVING and len(statuses) > 1:
+            finished = sum(
+                1 for status in statuses if status != ExportTargetStatus.ENCODING
             )
-
-            if not self.is_cancelled:
-                GLib.idle_add(completion_callback, success, filename)
-        except Exception as e:
-            logging.error(f"Export error: {e}")
-            if not self.is_cancelled:
-                GLib.idle_add(completion_callback, False, filename)
-        finally:
-            self.progress_handler.stop_progress_tracking()
+            return _("Saving files… ({} of {})").format(finished, len(statuses))
+        elif phase == ExportPhase.SAVING:
+            return _("Saving file…")
+        return _("Exporting…")
+
+    def _get_detail_text(self, fraction):
+        percent = int(fraction * 100)
+        remaining = self.get_remaining_seconds()
+        if remaining is None:
+            return f"{percent}%"
+
+        minutes, seconds = divmod(int(round(remaining)), 60)
+        return _("{}% · About {}:{:02d} Remaining").format(percent, minutes, seconds)
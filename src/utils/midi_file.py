@@ -0,0 +1,293 @@
+# utils/midi_file.py
+#
+# Copyright 2025 revisto
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import heapq
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+from ..config.constants import GROUP_TOGGLE_COUNT
+
+HEADER_CHUNK = b"MThd"
+TRACK_CHUNK = b"MTrk"
+DEFAULT_TICKS_PER_BEAT = 480
+
+META_EVENT = 0xFF
+META_SET_TEMPO = 0x51
+META_END_OF_TRACK = 0x2F
+SYSEX_EVENTS = (0xF0, 0xF7)
+NOTE_ON = 0x90
+NOTE_OFF = 0x80
+NOTE_VELOCITY = 100
+END_OF_TRACK_EVENT = bytes((0x00, META_EVENT, META_END_OF_TRACK, 0x00))
+
+# Number of data bytes following each channel message status
+CHANNEL_DATA_LENGTHS = {
+    0x80: 2,
+    0x90: 2,
+    0xA0: 2,
+    0xB0: 2,
+    0xC0: 1,
+    0xD0: 1,
+    0xE0: 2,
+}
+SYSTEM_DATA_LENGTHS = {0xF1: 1, 0xF2: 2, 0xF3: 1}
+# The same lengths indexed by status byte, for the parsing loop
+DATA_LENGTHS = tuple(
+    CHANNEL_DATA_LENGTHS.get(status & 0xF0, 0)
+    if status < 0xF0
+    else SYSTEM_DATA_LENGTHS.get(status, 0)
+    for status in range(256)
+)
+
+# Event kinds yielded by the track iterators
+EVENT_TEMPO = 0
+EVENT_NOTE_ON = 1
+
+
+@dataclass
+class MidiNoteHits:
+    """Every note-on of a MIDI file, flattened across tracks"""
+
+    ticks_per_beat: int
+    tempo: Optional[int]
+    notes: np.ndarray
+    ticks: np.ndarray
+
+    @property
+    def bpm(self) -> Optional[float]:
+        """Tempo of the last set_tempo event, if the file has one"""
+        if not self.tempo:
+            return None
+        return 60_000_000 / self.tempo
+
+    def get_steps(self) -> np.ndarray:
+        """Quantize every hit to the nearest 16th-note step"""
+        ticks_per_step = self.ticks_per_beat / GROUP_TOGGLE_COUNT
+        return np.rint(self.ticks / ticks_per_step).astype(np.int64)
+
+    def get_note_steps(self) -> Dict[int, np.ndarray]:
+        """Group the unique quantized steps by note
+
+        Notes are ordered by their first hit in the file.
+        """
+        steps = self.get_steps()
+        notes, first_hits = np.unique(self.notes, return_index=True)
+        return {
+            int(note): np.unique(steps[self.notes == note])
+            for note in notes[np.argsort(first_hits)]
+        }
+
+
+def read_note_hits(file_path: str) -> MidiNoteHits:
+    """Read the tempo and all note-on events of a Standard MIDI File
+
+    Tracks are parsed straight from the file bytes and merged by absolute
+    tick without building a message object per event.
+
+    Raises:
+        ValueError: If the file is not a valid Standard MIDI File
+    """
+    with open(file_path, "rb") as midi_file:
+        data = midi_file.read()
+
+    try:
+        ticks_per_beat, track_ranges = _read_chunks(data)
+        tracks = [_iter_track_events(data, start, end) for start, end in track_ranges]
+
+        tempo = None
+        notes: List[int] = []
+        ticks: List[int] = []
+        for tick, kind, value in heapq.merge(*tracks):
+            if kind == EVENT_TEMPO:
+                tempo = value
+            else:
+                notes.append(value)
+                ticks.append(tick)
+    except IndexError:
+        raise ValueError(f"Truncated MIDI file: {file_path}")
+
+    return MidiNoteHits(
+        ticks_per_beat,
+        tempo,
+        np.array(notes, dtype=np.int64),
+        np.array(ticks, dtype=np.int64),
+    )
+
+
+def bpm_to_tempo(bpm: float) -> int:
+    """Convert beats per minute to microseconds per beat"""
+    return int(round(60_000_000 / bpm))
+
+
+def encode_note_track(
+    steps: np.ndarray,
+    notes: np.ndarray,
+    ticks_per_beat: int = DEFAULT_TICKS_PER_BEAT,
+    tempo: Optional[int] = None,
+) -> bytes:
+    """Encode drum hits as an MTrk chunk of 16th-note chords
+
+    Hits on the same step form one chord: all note-ons, then all note-offs a
+    16th note later. Events are written with running status, as mido does.
+
+    Args:
+        steps: Step of every hit, sorted in ascending order
+        notes: MIDI note of every hit
+        ticks_per_beat: Time division of the file the track goes into
+        tempo: Microseconds per beat for a leading set_tempo event
+    """
+    track = bytearray()
+    if tempo is not None:
+        track += bytes((0x00, META_EVENT, META_SET_TEMPO, 0x03))
+        track += tempo.to_bytes(3, "big")
+
+    note_duration = ticks_per_beat // GROUP_TOGGLE_COUNT
+    chord_starts = np.flatnonzero(np.diff(steps, prepend=-1))
+    chord_ends = np.append(chord_starts[1:], len(steps))
+    chord_ticks = (steps[chord_starts] * ticks_per_beat) // GROUP_TOGGLE_COUNT
+    note_bytes = [bytes((note,)) for note in range(128)]
+    on_rest = bytes((0x00,))
+    on_tail = bytes((NOTE_VELOCITY,))
+    off_tail = bytes((0x00,))
+    note_list = notes.tolist()
+
+    last_tick = 0
+    for start, end, tick in zip(
+        chord_starts.tolist(), chord_ends.tolist(), chord_ticks.tolist()
+    ):
+        chord = [note_bytes[note] for note in note_list[start:end]]
+        track += _encode_varlen(tick - last_tick)
+        track.append(NOTE_ON)
+        track += (on_tail + on_rest).join(chord) + on_tail
+        track += _encode_varlen(note_duration)
+        track.append(NOTE_OFF)
+        track += (off_tail + on_rest).join(chord) + off_tail
+        last_tick = tick + note_duration
+
+    track += END_OF_TRACK_EVENT
+    return TRACK_CHUNK + len(track).to_bytes(4, "big") + track
+
+
+def write_midi_file(
+    file_path: str, tracks: List[bytes], ticks_per_beat: int = DEFAULT_TICKS_PER_BEAT
+) -> None:
+    """Write encoded MTrk chunks to a format 1 Standard MIDI File"""
+    header = HEADER_CHUNK + (6).to_bytes(4, "big")
+    header += (1).to_bytes(2, "big") + len(tracks).to_bytes(2, "big")
+    header += ticks_per_beat.to_bytes(2, "big")
+    with open(file_path, "wb") as midi_file:
+        midi_file.write(header)
+        for track in tracks:
+            midi_file.write(track)
+
+
+def _encode_varlen(value: int) -> bytes:
+    """Encode a variable-length quantity"""
+    if value < 0x80:
+        return bytes((value,))
+    encoded = [value & 0x7F]
+    value >>= 7
+    while value:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(reversed(encoded))
+
+
+def _read_chunks(data: bytes) -> Tuple[int, List[Tuple[int, int]]]:
+    """Parse the header and return ticks per beat and each track's byte range"""
+    if data[:4] != HEADER_CHUNK:
+        raise ValueError("Not a Standard MIDI File")
+    header_length = int.from_bytes(data[4:8], "big")
+    division = int.from_bytes(data[12:14], "big")
+    # SMPTE time division has the high bit set; treat it like a missing value
+    ticks_per_beat = division if division and not division & 0x8000 else None
+
+    track_ranges = []
+    offset = 8 + header_length
+    while offset + 8 <= len(data):
+        type_end = offset + 4
+        start = offset + 8
+        chunk_type = data[offset:type_end]
+        chunk_length = int.from_bytes(data[type_end:start], "big")
+        offset = start + chunk_length
+        if chunk_type == TRACK_CHUNK:
+            track_ranges.append((start, min(offset, len(data))))
+
+    return ticks_per_beat or DEFAULT_TICKS_PER_BEAT, track_ranges
+
+
+def _read_varlen(data: bytes, offset: int) -> Tuple[int, int]:
+    """Decode a variable-length quantity, returning it and the next offset"""
+    value = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value = (value << 7) | (byte & 0x7F)
+        if byte < 0x80:
+            return value, offset
+
+
+def _iter_track_events(
+    data: bytes, offset: int, end: int
+) -> Iterator[Tuple[int, int, int]]:
+    """Yield (absolute tick, event kind, value) for tempo and note-on events
+
+    The value is the tempo in microseconds per beat or the note number.
+    """
+    tick = 0
+    status = 0
+    while offset < end:
+        # Most delta times fit in a single byte
+        byte = data[offset]
+        if byte < 0x80:
+            tick += byte
+            offset += 1
+        else:
+            delta, offset = _read_varlen(data, offset)
+            tick += delta
+        byte = data[offset]
+
+        if byte == META_EVENT:
+            meta_type = data[offset + 1]
+            length, offset = _read_varlen(data, offset + 2)
+            if meta_type == META_END_OF_TRACK:
+                return
+            if meta_type == META_SET_TEMPO and length == 3:
+                payload_end = offset + 3
+                yield tick, EVENT_TEMPO, int.from_bytes(
+                    data[offset:payload_end], "big"
+                )
+            offset += length
+            continue
+
+        if byte in SYSEX_EVENTS:
+            length, offset = _read_varlen(data, offset + 1)
+            offset += length
+            continue
+
+        # Channel message, possibly relying on running status
+        if byte & 0x80:
+            status = byte
+            offset += 1
+        elif not status:
+            raise ValueError("MIDI data byte without a running status")
+
+        if status & 0xF0 == NOTE_ON and data[offset + 1]:
+            yield tick, EVENT_NOTE_ON, data[offset]
+        offset += DATA_LENGTHS[status]
@@ -0,0 +1,134 @@
+# utils/project_file.py
+#
+# Copyright 2025 revisto
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import os
+import json
+import struct
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Sequence
+from ..models.drum_part import DrumPart
+from ..models.pattern import Pattern, PatternView
+
+PROJECT_EXTENSION = ".dmproj"
+PROJECT_MAGIC = b"DMPROJ"
+PROJECT_FORMAT_VERSION = 1
+# Format version and JSON header length, little-endian
+PROJECT_PREFIX = struct.Struct("<HI")
+
+
+@dataclass
+class ProjectData:
+    """Everything needed to restore a session from a project file"""
+
+    bpm: float
+    parts: List[DrumPart]
+    pattern: Pattern
+
+
+def encode_project(
+    bpm: float, parts: Sequence[DrumPart], pattern: PatternView
+) -> bytes:
+    """Encode a session as project file bytes
+
+    The file is the magic, the format version, a JSON header with the BPM,
+    the part list and the pattern's row order, then the pattern matrix
+    packed to one bit per step, row by row.
+    """
+    steps = max(pattern.last_active_step() + 1, 1)
+    header = {
+        "bpm": bpm,
+        "parts": [part.to_dict() for part in parts],
+        "rows": pattern.part_ids,
+        "steps": steps,
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    bits = np.packbits(pattern.matrix[:, :steps], axis=1)
+    return b"".join(
+        (
+            PROJECT_MAGIC,
+            PROJECT_PREFIX.pack(PROJECT_FORMAT_VERSION, len(header_bytes)),
+            header_bytes,
+            bits.tobytes(),
+        )
+    )
+
+
+def decode_project(data: bytes) -> ProjectData:
+    """Decode project file bytes
+
+    Raises:
+        ValueError: If the data is not a project this version can read
+    """
+    if not data.startswith(PROJECT_MAGIC):
+        raise ValueError("Not a Drum Machine project")
+    offset = len(PROJECT_MAGIC)
+    try:
+        version, header_length = PROJECT_PREFIX.unpack_from(data, offset)
+    except struct.error:
+        raise ValueError("Truncated project header")
+    if version > PROJECT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported project format version {version}")
+
+    offset += PROJECT_PREFIX.size
+    header_end = offset + header_length
+    header = json.loads(data[offset:header_end].decode("utf-8"))
+
+    rows, steps = header["rows"], header["steps"]
+    row_bytes = (steps + 7) // 8
+    if len(data) - header_end < len(rows) * row_bytes:
+        raise ValueError("Truncated project pattern data")
+    bits = np.frombuffer(
+        data, dtype=np.uint8, count=len(rows) * row_bytes, offset=header_end
+    ).reshape(len(rows), row_bytes)
+    matrix = np.unpackbits(bits, axis=1, count=steps).astype(np.bool_)
+
+    return ProjectData(
+        bpm=header["bpm"],
+        parts=[DrumPart.from_dict(part) for part in header["parts"]],
+        pattern=Pattern.from_matrix(rows, matrix),
+    )
+
+
+def write_project(
+    file_path: str,
+    bpm: float,
+    parts: Sequence[DrumPart],
+    pattern: PatternView,
+    sync: bool = False,
+) -> None:
+    """Write a project file, replacing any existing file atomically
+
+    Args:
+        sync: Flush the file to disk before it replaces the old one
+    """
+    data = encode_project(bpm, parts, pattern)
+    temp_path = f"{file_path}.tmp"
+    with open(temp_path, "wb") as project_file:
+        project_file.write(data)
+        if sync:
+            project_file.flush()
+            os.fsync(project_file.fileno())
+    os.replace(temp_path, file_path)
+
+
+def read_project(file_path: str) -> ProjectData:
+    """Read a project file in a single read"""
+    with open(file_path, "rb") as project_file:
+        return decode_project(project_file.read())
@@ -18,6 +18,7 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import os
+import time
 import logging
 from typing import Optional
 
@@ -33,12 +34,16 @@ from .config.constants import NUM_TOGGLES, DEFAULT_BPM, DEFAULT_VOLUME
 from .handlers.file_dialog_handler import FileDialogHandler
 from .handlers.window_actions import WindowActionHandler
 from .handlers.drag_drop_handler import DragDropHandler
+from .models.pattern import PatternChange
 from .services.drum_machine_service import DrumMachineService
 from .services.save_changes_service import SaveChangesService
 from .services.sound_service import SoundService
-from .services.audio_export_service import AudioExportService
+from .services.pattern_library_service import PatternLibraryService
+from .services.autosave_service import AutosaveService
+from .services.history_service import HistoryService
 from .services.ui_helper import UIHelper
 from .ui.drum_grid_builder import DrumGridBuilder
+from .utils.timing import log_duration
 
 
 @Gtk.Template(resource_path="/io/github/revisto/drum-machine/window.ui")
@@ -58,9 +63,17 @@ class DrumMachineWindow(Adw.ApplicationWindow):
 
     def __init__(self, **kwargs) -> None:
         super().__init__(**kwargs)
-        self._setup_services()
-        self._setup_handlers()
-        self._initialize_interface()
+        self._startup_time = time.perf_counter()
+        with log_duration("Startup: services"):
+            self._setup_services()
+        with log_duration("Startup: handlers"):
+            self._setup_handlers()
+
+        # Show the window shell right away: samples decode on a worker thread
+        # and the grid is built once the first frame is up
+        self.play_pause_button.set_sensitive(False)
+        self.sound_service.load_sounds_async(self._on_sounds_loaded)
+        GLib.idle_add(self._initialize_interface)
 
     def _setup_services(self) -> None:
         """Initialize all services"""
@@ -71,18 +84,45 @@ class DrumMachineWindow(Adw.ApplicationWindow):
 
         try:
             self.sound_service = SoundService(bundled_sounds_dir)
-            self.sound_service.load_sounds()
         except Exception as e:
             logging.critical(f"Failed to initialize sound service: {e}")
             raise
 
-        self.audio_export_service = AudioExportService(self)
+        self.pattern_library_service = PatternLibraryService(
+            os.path.join(os.path.dirname(__file__), "..", "data", "patterns")
+        )
+
+        # Created on first export, see the properties below
+        self._audio_export_service = None
+        self._export_queue_service = None
 
         self.ui_helper = UIHelper(self)
         self.drum_machine_service = DrumMachineService(
             self, self.sound_service, self.ui_helper
         )
         self.save_changes_service = SaveChangesService(self, self.drum_machine_service)
+        self.autosave_service = AutosaveService(self)
+        self.history_service = HistoryService(self)
+
+    @property
+    def audio_export_service(self):
+        """The export service, imported and created on first use"""
+        if self._audio_export_service is None:
+            from .services.audio_export_service import AudioExportService
+
+            self._audio_export_service = AudioExportService(self)
+        return self._audio_export_service
+
+    @property
+    def export_queue_service(self):
+        """The export queue, imported and created on first use"""
+        if self._export_queue_service is None:
+            from .services.export_queue_service import ExportQueueService
+
+            self._export_queue_service = ExportQueueService(
+                self.audio_export_service
+            )
+        return self._export_queue_service
 
     def _setup_handlers(self) -> None:
         """Initialize UI handlers"""
@@ -91,8 +131,20 @@ class DrumMachineWindow(Adw.ApplicationWindow):
         self.file_dialog_handler = FileDialogHandler(self)
         self.drag_drop_handler = DragDropHandler(self)
 
-    def _initialize_interface(self) -> None:
+    def _on_sounds_loaded(self) -> None:
+        elapsed = (time.perf_counter() - self._startup_time) * 1000
+        logging.info(f"Startup: samples ready after {elapsed:.1f} ms")
+        self.play_pause_button.set_sensitive(True)
+
+    def _initialize_interface(self) -> bool:
         """Initialize the complete interface"""
+        with log_duration("Startup: interface"):
+            self._build_interface()
+        elapsed = (time.perf_counter() - self._startup_time) * 1000
+        logging.info(f"Startup: interface ready after {elapsed:.1f} ms")
+        return GLib.SOURCE_REMOVE
+
+    def _build_interface(self) -> None:
         # Build drum grid
         drum_interface = self.drum_grid_builder.build_drum_machine_interface()
         self.drum_machine_box.append(drum_interface)
@@ -100,23 +152,55 @@ class DrumMachineWindow(Adw.ApplicationWindow):
         # Setup other components
         self.file_dialog_handler.setup_pattern_menu()
         self._connect_signals()
+        # A breakpoint may have applied before the grid existed
+        self._on_breakpoint_changed(self.drum_machine_box, None)
         self.action_handler.setup_actions()
 
         # Setup drag and drop
         self.drag_drop_handler.setup_drag_drop()
 
-        # Initialize export button state
+        # Initialize export button state and keep it in sync with the pattern
+        self.update_export_button_sensitivity()
+        self.drum_machine_service.pattern.add_listener(self._on_pattern_changed)
+
+        # Restore a session that did not exit cleanly, then journal this one
+        self._recover_autosave()
+        self.autosave_service.start()
+
+    def _recover_autosave(self) -> None:
+        try:
+            project = self.autosave_service.recover()
+            if project is None:
+                return
+            with self.drum_grid_builder.batch_update():
+                self.drum_machine_service.restore_project(project)
+                self.refresh_pattern_view()
+        except Exception as e:
+            logging.error(f"Failed to recover autosave: {e}")
+            return
+        finally:
+            # The recovered session is where undo starts, not an edit to undo
+            self.history_service.clear()
+
+        self.save_changes_service.mark_unsaved_changes(True)
+        self.show_toast(_("Recovered unsaved changes"))
+
+    def refresh_pattern_view(self) -> None:
+        """Bring the grid and controls in line with a restored pattern"""
+        self.drum_machine_service.update_total_beats()
+        self.drum_grid_builder.reset_carousel_pages()
         self.update_export_button_sensitivity()
 
     def update_export_button_sensitivity(self) -> None:
         """Update the sensitivity of export and clear buttons based on pattern state"""
-        has_active_beats = any(
-            any(beats.values())
-            for beats in self.drum_machine_service.drum_parts_state.values()
-        )
+        has_active_beats = self.drum_machine_service.pattern.any_active()
         self.export_audio_button.set_sensitive(has_active_beats)
         self.clear_button.set_sensitive(has_active_beats)
 
+    def _on_pattern_changed(self, change: PatternChange) -> None:
+        """Refresh pattern-dependent controls after any pattern edit"""
+        self.update_export_button_sensitivity()
+
     def _connect_signals(self) -> None:
         """Connect UI signals"""
         self.connect("close-request", self._on_close_request)
@@ -143,10 +227,11 @@ class DrumMachineWindow(Adw.ApplicationWindow):
         # Handle compact spacing for instrument list
         is_compact = "compact" in css_classes
         self.drum_grid_builder.update_drum_parts_spacing(is_compact=is_compact)
+        self.drum_grid_builder.update_step_grid_metrics(css_classes)
 
     def handle_layout_change(self, is_tiny: bool) -> None:
         """
-        Rebuilds the drum grid when the layout size changes.
+        Re-flows the drum grid when the layout size changes.
         """
         focus_beat_index = 0
         old_beats_per_page = self.drum_machine_service.beats_per_page
@@ -157,7 +242,7 @@ class DrumMachineWindow(Adw.ApplicationWindow):
         else:
             beats_per_page = NUM_TOGGLES
 
-        # Avoid rebuilding if the layout hasn't actually changed
+        # Avoid re-flowing if the layout hasn't actually changed
         if self.drum_machine_service.beats_per_page == beats_per_page:
             return
 
@@ -171,9 +256,8 @@ class DrumMachineWindow(Adw.ApplicationWindow):
         self.drum_machine_service.beats_per_page = beats_per_page
         self.drum_machine_service.update_total_beats()
 
-        # Rebuild the grid with the new size. The builder will handle loading
-        # the pattern.
-        self.drum_grid_builder.rebuild_carousel(focus_beat_index=focus_beat_index)
+        # Re-flow the existing pages into the new width
+        self.drum_grid_builder.reflow_carousel(focus_beat_index=focus_beat_index)
 
     # Delegate methods to handlers
     def _on_open_file_clicked(self, button: Gtk.Button) -> None:
@@ -193,28 +277,17 @@ class DrumMachineWindow(Adw.ApplicationWindow):
             self.carousel.scroll_to(self.carousel.get_nth_page(page_index), True)
 
     # Event handlers that need to stay in window
-    def on_toggle_changed(
-        self, toggle_button: Gtk.ToggleButton, part: str, index: int
-    ) -> None:
-        state = toggle_button.get_active()
-
-        if state:
-            self.drum_machine_service.drum_parts_state[part][index] = True
-        else:
-            self.drum_machine_service.drum_parts_state[part].pop(index, None)
-
-        # Tell the service to recalculate the total pattern length
-        self.drum_machine_service.update_total_beats()
-
-        # Update export button sensitivity
-        self.update_export_button_sensitivity()
+    def on_step_toggled(self, part: str, index: int, state: bool) -> None:
+        self.drum_machine_service.pattern.set_step(part, index, state)
 
         # Mark as unsaved when toggles change
         self.save_changes_service.mark_unsaved_changes(True)
 
     def on_bpm_changed(self, spin_button: Gtk.SpinButton) -> None:
         value = spin_button.get_value()
+        self.history_service.record_bpm(self.drum_machine_service.bpm, value)
         self.drum_machine_service.set_bpm(value)
+        self.autosave_service.record_bpm(value)
 
         # Update tooltip and accessibility with current BPM
         bpm_text = _("{} Beats per Minute (BPM)").format(int(value))
@@ -231,7 +304,8 @@ class DrumMachineWindow(Adw.ApplicationWindow):
 
     def handle_clear(self, button: Gtk.Button) -> None:
         """Clear the pattern but keep samples"""
-        self.drum_machine_service.clear_all_toggles()
+        with self.history_service.record_session():
+            self.drum_machine_service.clear_all_toggles()
         self.drum_machine_service.update_total_beats()
         self.drum_grid_builder.reset_carousel_pages()
         self.update_export_button_sensitivity()
@@ -239,20 +313,22 @@ class DrumMachineWindow(Adw.ApplicationWindow):
 
     def reset_to_defaults(self) -> None:
         """Clear pattern and restore default samples, BPM, and volume"""
-        self.drum_machine_service.clear_all_toggles()
-        self.sound_service.drum_part_manager.reset_to_defaults()
-        self.sound_service.reload_sounds()
-        self.drum_machine_service.drum_parts_state = (
-            self.drum_machine_service.create_empty_drum_parts_state()
-        )
-        self.drum_machine_service.set_bpm(DEFAULT_BPM)
-        self.drum_machine_service.set_volume(DEFAULT_VOLUME)
-        self.drum_grid_builder.rebuild_drum_parts_column()
-        self.drum_grid_builder.rebuild_carousel()
-        self.drum_machine_service.update_total_beats()
-        self.drum_grid_builder.reset_carousel_pages()
-        self.bpm_spin_button.set_value(DEFAULT_BPM)
-        self.volume_button.set_value(DEFAULT_VOLUME)
+        with self.drum_grid_builder.batch_update():
+            with self.history_service.record_session():
+                self.drum_machine_service.clear_all_toggles()
+                self.sound_service.drum_part_manager.reset_to_defaults()
+                self.sound_service.load_sounds_async()
+                self.drum_machine_service.pattern.replace_with(
+                    self.drum_machine_service.create_empty_pattern()
+                )
+                self.drum_machine_service.set_bpm(DEFAULT_BPM)
+                self.drum_machine_service.set_volume(DEFAULT_VOLUME)
+                self.drum_grid_builder.rebuild_drum_parts_column()
+                self.drum_grid_builder.rebuild_carousel()
+                self.drum_machine_service.update_total_beats()
+                self.drum_grid_builder.reset_carousel_pages()
+                self.bpm_spin_button.set_value(DEFAULT_BPM)
+                self.volume_button.set_value(DEFAULT_VOLUME)
         self.update_export_button_sensitivity()
         self.save_changes_service.mark_unsaved_changes(False)
 
@@ -269,17 +345,6 @@ class DrumMachineWindow(Adw.ApplicationWindow):
     def on_drum_part_button_clicked(self, button: Gtk.Button, part: str) -> None:
         self.drum_machine_service.preview_drum_part(part)
 
-    def _on_right_click_released(
-        self,
-        gesture_click: Gtk.GestureClick,
-        n_press: int,
-        x: float,
-        y: float,
-        toggle_button: Gtk.ToggleButton,
-    ) -> None:
-        toggle_button.set_active(not toggle_button.props.active)
-        toggle_button.emit("toggled")
-
     def _on_close_request(self, *args) -> bool:
         self.action_handler.on_quit_action(None, None)
         return True
@@ -292,6 +357,9 @@ class DrumMachineWindow(Adw.ApplicationWindow):
         if self.drum_machine_service.playing:
             self.drum_machine_service.stop()
         self.drum_machine_service.playing = False
+        if self._export_queue_service:
+            self._export_queue_service.shutdown()
+        self.autosave_service.shutdown()
 
     def cleanup_and_destroy(self) -> None:
         self.cleanup()